@@ -0,0 +1,91 @@
+"""
+Benchmarks for the client's hot paths, run against an in-process server.
+
+    python -m benchmarks run --output results.json
+    python -m benchmarks compare results.json --threshold 0.1
+
+`run` exits with status 1 when a benchmark exceeds its budget, `compare` when
+a benchmark's median got slower than the baseline by more than the threshold.
+The baseline is benchmarks/baseline.json unless `--baseline` says otherwise;
+refresh it with `run --output benchmarks/baseline.json` when a change is meant
+to move the numbers.
+"""
+import argparse
+import json
+import os
+import sys
+
+from .suite import BENCHMARKS, run_benchmark
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def run(args):
+    results = {}
+    over_budget = []
+    for name in BENCHMARKS:
+        if args.select and args.select not in name:
+            continue
+        result = results[name] = run_benchmark(name, args.rounds)
+        flag = ""
+        if result["budget"] is not None and result["median"] > result["budget"]:
+            over_budget.append(name)
+            flag = "OVER BUDGET ({}s)".format(result["budget"])
+        print("{:<32} {:>10.4f}s {}".format(name, result["median"], flag))
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(results, fh, indent=2, sort_keys=True)
+    return 1 if over_budget else 0
+
+
+def compare(args):
+    with open(args.baseline) as fh:
+        baseline = json.load(fh)
+    with open(args.results) as fh:
+        results = json.load(fh)
+
+    regressions = []
+    for name, result in sorted(results.items()):
+        if name not in baseline:
+            print("{:<32} {:>10.4f}s (new)".format(name, result["median"]))
+            continue
+        change = result["median"] / baseline[name]["median"] - 1
+        flag = ""
+        if change > args.threshold:
+            regressions.append(name)
+            flag = "REGRESSION"
+        print(
+            "{:<32} {:>10.4f}s {:>+8.1%} {}".format(
+                name, result["median"], change, flag
+            )
+        )
+    return 1 if regressions else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+
+    run_parser = commands.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument("-o", "--output", help="write the results to a file")
+    run_parser.add_argument("-k", "--select", help="only run matching benchmarks")
+    run_parser.add_argument("--rounds", type=int, help="rounds per benchmark")
+    run_parser.set_defaults(fn=run)
+
+    compare_parser = commands.add_parser(
+        "compare", help="compare a result file to the baseline"
+    )
+    compare_parser.add_argument("results")
+    compare_parser.add_argument("--baseline", default=BASELINE)
+    compare_parser.add_argument(
+        "--threshold", type=float, default=0.1, help="allowed slow down, 0.1 is 10%%"
+    )
+    compare_parser.set_defaults(fn=compare)
+
+    args = parser.parse_args(argv)
+    return args.fn(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+import os
+import sys
+from datetime import date, datetime, timedelta
+
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+
+from restless_client import Client
+
+# the benchmarks run against the same in-process server the tests use
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "tests"))
+from conftest import RaiseSession, build_endpoints  # noqa E402
+
+URL = "http://bench"
+WIDE_COLUMNS = 30
+
+
+class Registry:
+    def __init__(self):
+        self.class_registry = {}
+
+    def add(self, model):
+        self.class_registry[model.__name__] = model
+        return model
+
+
+def create_app(rows=500, children=10, extra_models=0):
+    """
+    Build a server with `rows` parents, each with `children` children and a
+    wide row, and `extra_models` additional models to grow the datamodel.
+    """
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db = SQLAlchemy(app)
+    app.db = db
+    models = Registry()
+
+    @models.add
+    class Parent(db.Model):
+        id = db.Column(db.Integer, primary_key=True)
+        name = db.Column(db.String)
+        created = db.Column(db.DateTime)
+
+    @models.add
+    class Child(db.Model):
+        id = db.Column(db.Integer, primary_key=True)
+        name = db.Column(db.String)
+        parent_id = db.Column(db.Integer, db.ForeignKey("parent.id"))
+        parent = db.relationship(Parent, backref="children")
+
+    columns = {"id": db.Column(db.Integer, primary_key=True)}
+    for i in range(WIDE_COLUMNS):
+        column_type = [db.String, db.Integer, db.Float, db.Date, db.DateTime][i % 5]
+        columns["column_{}".format(i)] = db.Column(column_type)
+    Wide = models.add(type("Wide", (db.Model,), columns))
+
+    for i in range(extra_models):
+        columns = {"id": db.Column(db.Integer, primary_key=True)}
+        for j in range(10):
+            columns["column_{}".format(j)] = db.Column(db.String)
+        models.add(type("Extra{}".format(i), (db.Model,), columns))
+
+    db.create_all()
+    now = datetime(2020, 1, 1)
+    for i in range(rows):
+        parent = Parent(name="parent {}".format(i), created=now + timedelta(i))
+        db.session.add(parent)
+        for j in range(children):
+            db.session.add(Child(name="child {}.{}".format(i, j), parent=parent))
+        values = [
+            "value {}".format(i),
+            i,
+            i / 3,
+            date(2020, 1, 1) + timedelta(i),
+            now + timedelta(i),
+        ]
+        db.session.add(
+            Wide(**{"column_{}".format(c): values[c % 5] for c in range(WIDE_COLUMNS)})
+        )
+    db.session.commit()
+    build_endpoints(app, models)
+    return app
+
+
+def create_client(app, **kwargs):
+    RaiseSession.register(URL, app)
+    return Client(url=URL, session=RaiseSession(), **kwargs)
@@ -0,0 +1,156 @@
+import re
+import statistics
+import subprocess
+import sys
+import time
+from functools import lru_cache
+
+from .fixtures import create_app, create_client
+
+BENCHMARKS = {}
+
+
+def benchmark(rounds=5, budget=None, server=True, **app_kwargs):
+    """
+    Register a benchmark. The decorated function gets a server built with
+    `app_kwargs` (or None without `server`) and returns a `setup` function,
+    called before every round without being timed, and a `run` function that
+    is timed and gets whatever `setup` returned. A `run` that returns a number
+    reports its own timing. A median above `budget` seconds fails the run.
+    """
+
+    def decorator(fn):
+        BENCHMARKS[fn.__name__] = (fn, rounds, budget, server, app_kwargs)
+        return fn
+
+    return decorator
+
+
+@lru_cache(maxsize=None)
+def get_app(**app_kwargs):
+    return create_app(**app_kwargs)
+
+
+def run_benchmark(name, rounds=None):
+    fn, default_rounds, budget, server, app_kwargs = BENCHMARKS[name]
+    setup, run = fn(get_app(**app_kwargs) if server else None)
+    timings = []
+    for _ in range(rounds or default_rounds):
+        args = setup()
+        started = time.perf_counter()
+        timing = run(args)
+        if timing is None:
+            timing = time.perf_counter() - started
+        timings.append(timing)
+    return {
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "rounds": len(timings),
+        "budget": budget,
+    }
+
+
+@benchmark(rows=200)
+def load_query_pages(app):
+    def setup():
+        return create_client(app, page_size=20)
+
+    def run(client):
+        assert len(client.Parent.query.all()) == 200
+
+    return setup, run
+
+
+@benchmark(rows=200)
+def deserialize_wide_objects(app):
+    def setup():
+        client = create_client(app)
+        raw = client.connection.request(
+            client.Wide._rlc.base_url, params={"results_per_page": 100}
+        )
+        return client, raw["objects"]
+
+    def run(args):
+        client, objects = args
+        with client.loading:
+            [client.Wide(**obj) for obj in objects]
+
+    return setup, run
+
+
+@benchmark(rows=1)
+def build_filters(app):
+    def setup():
+        return create_client(app)
+
+    def run(client):
+        Child = client.Child
+        for i in range(500):
+            query = Child.query.filter(
+                (Child.name == "child {}".format(i)) | Child.name.like_("%.0"),
+                Child.parent.name != "parent",
+                Child.id.in_([1, 2, 3]),
+            ).order_by(name="asc")
+            query._get_query()
+
+    return setup, run
+
+
+@benchmark(rows=100)
+def save_dirty_objects(app):
+    def setup():
+        client = create_client(app)
+        for parent in client.Parent.query.all():
+            parent.name = parent.name + "."
+        return client
+
+    def run(client):
+        client.save()
+
+    return setup, run
+
+
+@benchmark(rows=50)
+def lazy_load_n_plus_one(app):
+    def setup():
+        client = create_client(app)
+        return client.Child.query.filter(client.Child.name.like_("%.0")).all()
+
+    def run(children):
+        assert len(children) == 50
+        for child in children:
+            child.parent.children
+
+    return setup, run
+
+
+@benchmark(rows=1, extra_models=50)
+def initialize_large_datamodel(app):
+    def setup():
+        return None
+
+    def run(_):
+        create_client(app)
+
+    return setup, run
+
+
+@benchmark(rounds=10, budget=0.25, server=False)
+def import_time(_):
+    def setup():
+        return None
+
+    def run(_):
+        # the cumulative import time of the package in a fresh interpreter
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import restless_client"],
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+            check=True,
+        )
+        for line in result.stderr.splitlines():
+            match = re.search(r"\|\s*(\d+) \| restless_client$", line)
+            if match:
+                return int(match.group(1)) / 10**6
+
+    return setup, run
@@ -1,7 +1,11 @@
-__all__ = ("__version__", "Client", "inspect")
+__all__ = ("__version__", "Client", "inspect", "log_to_stdout")
 
-from .client import Client  # noqa F401
+from .client import Client, log_to_stdout  # noqa F401
 from .inspect import inspect  # noqa F401
-from .utils import VERSION
+from .utils import get_version
 
-__version__ = VERSION
+
+def __getattr__(name):
+    if name == "__version__":
+        return get_version()
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
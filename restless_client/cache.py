@@ -0,0 +1,63 @@
+import time
+from weakref import WeakKeyDictionary
+
+from .utils import State
+
+
+class PropertyCache:
+    """
+    Holds server property values per instance.
+
+    `ttl` is the number of seconds a value stays valid, `True` to keep it until
+    it is expired explicitly, or `None` to not cache at all. It can also be a
+    dict keyed by "Model" or "Model.property". Instances are referenced weakly,
+    so a cached value never keeps its instance alive.
+    """
+
+    def __init__(self, opts):
+        self.ttl = opts.property_ttl
+        self.prefetch_ttl = None
+        if not opts._property_ttl_set_by_user:
+            self.prefetch_ttl = opts.prefetch_ttl
+        self.entries = WeakKeyDictionary()
+
+    def ttl_for(self, obj, attribute):
+        ttl = self.ttl
+        if isinstance(ttl, dict):
+            class_name = obj._rlc.class_name
+            key = "{}.{}".format(class_name, attribute)
+            ttl = ttl.get(key, ttl.get(class_name))
+        return ttl
+
+    def prefetch_ttl_for(self, obj, attribute):
+        """
+        The ttl of a prefetched value. Without a configured ttl, prefetched
+        values are kept for `prefetch_ttl` seconds, as they're fetched to be
+        read later.
+        """
+        return self.prefetch_ttl or self.ttl_for(obj, attribute)
+
+    def get(self, obj, attribute):
+        entry = self.entries.get(obj, {}).get(attribute)
+        if entry is None:
+            return State.VOID
+        value, expires = entry
+        if expires is not None and expires < time.monotonic():
+            self.expire(obj, attribute)
+            return State.VOID
+        return value
+
+    def set(self, obj, attribute, value, ttl=None):  # noqa A003
+        ttl = ttl or self.ttl_for(obj, attribute)
+        if not ttl:
+            return
+        expires = None if ttl is True else time.monotonic() + ttl
+        self.entries.setdefault(obj, {})[attribute] = (value, expires)
+
+    def expire(self, obj, *attributes):
+        if not attributes:
+            self.entries.pop(obj, None)
+            return
+        values = self.entries.get(obj, {})
+        for attribute in attributes:
+            values.pop(attribute, None)
@@ -0,0 +1,143 @@
+"""
+Command line tools of the client.
+
+    restless-client generate http://localhost:5000 -o models.py
+
+writes a module with the datamodel of the server and a class per model, to be
+used as `Client(url, models=models)`.
+"""
+import argparse
+import pprint
+import sys
+
+from .ext.auth import Session
+from .utils import urljoin
+
+DATA_MODEL_ENDPOINT = "api/flask-restless-datamodel"
+
+# python types of the attribute types reported by the datamodel
+PYTHON_TYPES = {
+    "integer": "int",
+    "biginteger": "int",
+    "smallinteger": "int",
+    "string": "str",
+    "text": "str",
+    "unicode": "str",
+    "unicodetext": "str",
+    "float": "float",
+    "boolean": "bool",
+    "date": "date",
+    "datetime": "datetime",
+    "utcdatetime": "datetime",
+}
+
+HEADER = '''"""
+Models of {url}, generated by `restless-client generate`.
+
+Don't edit this module, generate it again when the models on the server change.
+"""
+from datetime import date, datetime  # noqa F401
+from typing import Any, Callable, List, Optional  # noqa F401
+
+DATAMODEL = {datamodel}
+'''
+
+
+def fetch_datamodel(url, session, endpoint=DATA_MODEL_ENDPOINT):
+    res = session.get(urljoin(url, endpoint))
+    res.raise_for_status()
+    return res.json()
+
+
+def ordered_models(datamodel):
+    """Model names, with polymorphic parents before their children."""
+    ordered = []
+
+    def add(name):
+        if name in ordered:
+            return
+        parent = datamodel[name].get("polymorphic", {}).get("parent")
+        if parent:
+            add(parent)
+        ordered.append(name)
+
+    for name in datamodel:
+        if name != "FlaskRestlessDatamodel":
+            add(name)
+    return ordered
+
+
+def generate_class(name, details):
+    parent = details.get("polymorphic", {}).get("parent")
+    lines = [
+        "class {}({}):".format(name, parent) if parent else "class {}:".format(name)
+    ]
+    for attribute, attribute_type in details["attributes"].items():
+        python_type = PYTHON_TYPES.get(attribute_type, "Any")
+        lines.append("    {}: Optional[{}]".format(attribute, python_type))
+    for relation, relation_details in details["relations"].items():
+        model = relation_details["foreign_model"]
+        if relation_details["relation_type"] in ("MANYTOONE", "ONETOONE"):
+            lines.append('    {}: Optional["{}"]'.format(relation, model))
+        else:
+            lines.append('    {}: List["{}"]'.format(relation, model))
+    for prop in details["properties"]:
+        lines.append("    {}: Any".format(prop))
+    for method in details["methods"]:
+        lines.append("    {}: Callable[..., Any]".format(method))
+    if len(lines) == 1:
+        lines.append("    pass")
+    return "\n".join(lines)
+
+
+def generate_module(datamodel, url):
+    """
+    The source of a module holding `datamodel` and a class per model. The
+    classes only carry annotations: a client given the module uses them as
+    bases of the classes it builds, so they show up in IDEs and type checkers
+    while the client provides the behaviour.
+    """
+    parts = [HEADER.format(url=url, datamodel=pprint.pformat(datamodel, indent=4))]
+    for name in ordered_models(datamodel):
+        parts.append(generate_class(name, datamodel[name]))
+    return "\n\n".join(parts) + "\n"
+
+
+def generate(args):
+    if args.username:
+        auth_url = args.auth_url or urljoin(args.url, "api/auth")
+        session = Session(auth_url, args.username, args.password)
+    else:
+        session = Session()
+    datamodel = fetch_datamodel(args.url, session, args.endpoint)
+    source = generate_module(datamodel, args.url)
+    if args.output:
+        with open(args.output, "w") as fh:
+            fh.write(source)
+    else:
+        sys.stdout.write(source)
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="restless-client")
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+
+    generate_parser = commands.add_parser(
+        "generate", help="generate a module of model classes from a server"
+    )
+    generate_parser.add_argument("url", help="the base url of the server")
+    generate_parser.add_argument("-o", "--output", help="defaults to stdout")
+    generate_parser.add_argument("--endpoint", default=DATA_MODEL_ENDPOINT)
+    generate_parser.add_argument("--username")
+    generate_parser.add_argument("--password")
+    generate_parser.add_argument("--auth-url")
+    generate_parser.set_defaults(fn=generate)
+
+    args = parser.parse_args(argv)
+    return args.fn(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
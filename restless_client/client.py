@@ -1,20 +1,25 @@
 import logging
 import sys
+import threading
 from collections import defaultdict
+from copy import deepcopy
 from itertools import chain
 
-import crayons
-from cereal_lazer import Cereal
-
-from .collections import ObjectCollection, TypedList
+from .cache import PropertyCache
+from .collections import LazyRelation, ObjectCollection, TypedList
 from .connection import Connection
 from .ext.auth import Session
 from .filter import QueryFactory
+from .hedging import HedgePolicy
 from .inspect import ModelMeta
 from .marshal import ObjectDeserializer, ObjectSerializer
 from .method import Method, construct_method
 from .models import BaseObject
+from .paging import PageSizeTuner
+from .payload import negotiate_payload
 from .property import LoadableProperty
+from .snapshot import restore, snapshot
+from .sync import sync
 from .utils import check_server_compatibility  # noqa
 from .utils import LoadingManager, RelationHelper, State, get_depth, urljoin
 
@@ -24,33 +29,68 @@ class UncallableProperty(Exception):
 
 
 def register_serializer(model):
+    """
+    Register `model` with cereal, serializing instances with the cleaners
+    compiled for the model by `ObjectSerializer.compile`.
+    """
     rlc = model._rlc
-    to_serialize = list(chain(rlc.attributes(), rlc.relations()))
+    cleaners = rlc.serializer.compiled[model][0]
+    fields = tuple(
+        (field, cleaners[field]) for field in chain(rlc.attributes(), rlc.relations())
+    )
 
     def load_model(value):
         return model(**value)
 
     def serialize_model(value):
-        return rlc.serializer._raw_serialize(value, to_serialize)
+        values = value._rlc.values
+        return {
+            field: clean(values[field], False)
+            for field, clean in fields
+            if field in values and not isinstance(values[field], LazyRelation)
+        }
 
     rlc.client.cereal.register_class(rlc.class_name, model, serialize_model, load_model)
 
 
+class Depth:
+    """The nesting depth of a log record, only colored when it's formatted."""
+
+    def __init__(self, depth):
+        self.depth = depth
+
+    def __str__(self):
+        import crayons
+
+        return str(crayons.yellow("{}>".format("-" * self.depth), True, True))
+
+
 class DepthFilter(logging.Filter):
     def filter(self, record):  # noqa A003
-        record.depth = crayons.yellow("{}>".format("-" * get_depth()), True, True)
+        record.depth = Depth(get_depth())
         return True
 
 
 logger = logging.getLogger("restless-client")
 logger.addFilter(DepthFilter())
-
-steam_handler = logging.StreamHandler(sys.stdout)
-steam_handler.setLevel(logging.DEBUG)
-formatter = logging.Formatter("%(depth)s %(message)s")
-steam_handler.setFormatter(formatter)
-logger.addHandler(steam_handler)
-logger.propagate = False
+logger.addHandler(logging.NullHandler())
+steam_handler = None
+
+
+def log_to_stdout(level=logging.DEBUG):
+    """
+    Print the client's log records to stdout, indented by how deeply nested
+    the load they belong to is. The client doesn't log anywhere by default.
+    """
+    global steam_handler
+    if steam_handler is None:
+        steam_handler = logging.StreamHandler(sys.stdout)
+        formatter = logging.Formatter("%(depth)s %(message)s")
+        steam_handler.setFormatter(formatter)
+        logger.addHandler(steam_handler)
+        logger.propagate = False
+    steam_handler.setLevel(level)
+    logger.setLevel(level)
 
 
 class Options:
@@ -69,6 +109,11 @@ class Options:
         self.CollectionClass = opts.pop("collection_class", ObjectCollection)
         # type of list used to keep track of instance relations
         self.TypedListClass = opts.pop("typed_list", TypedList)
+        # to-many relations loaded page by page from their relation endpoint,
+        # as "Model.relation" names or True for all of them
+        self.lazy_relations = opts.pop("lazy_relations", ())
+        # load embedded related objects only when one of their attributes is read
+        self.reference_stubs = opts.pop("reference_stubs", False)
         # the property used by constructed classes to handle model attributes
         self.LoadableProperty = opts.pop("loadable_property", LoadableProperty)
         # how to reach the server when calling an object function
@@ -77,11 +122,56 @@ class Options:
         self.SettableServerProperty = opts.pop(
             "settable_server_property_class", SettableServerProperty
         )
+        # keeps server property values around, see PropertyCache for the ttl
+        self.PropertyCache = opts.pop("property_cache_class", PropertyCache)
+        self._property_ttl_set_by_user = "property_ttl" in opts
+        self.property_ttl = opts.pop("property_ttl", None)
+        # seconds prefetched values are kept for when property_ttl isn't set
+        self.prefetch_ttl = opts.pop("prefetch_ttl", 60)
+
+        # results_per_page sent when loading a query, None tunes it per model
+        self.PageSizeTuner = opts.pop("page_size_tuner", PageSizeTuner)
+        self.page_size = opts.pop("page_size", None)
+        self.min_page_size = opts.pop("min_page_size", 10)
+        # flask-restless caps results_per_page to max_results_per_page (100)
+        self.max_page_size = opts.pop("max_page_size", 100)
+        self.target_page_bytes = opts.pop("target_page_bytes", 512 * 1024)
+        self.target_page_latency = opts.pop("target_page_latency", 1.0)
+
+        # number of threads used when requests are sent concurrently
+        self.concurrency = opts.pop("concurrency", 8)
+        # send a duplicate of a GET that is slower than the hedge_percentile of
+        # recent latencies, with hedges capped to hedge_budget of all GETs
+        self.hedge = opts.pop("hedge", False)
+        self.HedgePolicy = opts.pop("hedge_policy", HedgePolicy)
+        self.hedge_percentile = opts.pop("hedge_percentile", 0.95)
+        self.hedge_budget = opts.pop("hedge_budget", 0.05)
+        self.hedge_min_delay = opts.pop("hedge_min_delay", 0.01)
+        self.hedge_window = opts.pop("hedge_window", 500)
+        # let concurrent identical GETs share a single request
+        self.coalesce_requests = opts.pop("coalesce_requests", True)
+        # gzip JSON request bodies of at least this many bytes, None disables it
+        self.compress_requests_above = opts.pop("compress_requests_above", None)
+        # size of the session's connection pool, None keeps the session's own
+        self.pool_connections = opts.pop("pool_connections", 10)
+        self.pool_maxsize = opts.pop("pool_maxsize", None)
+        # try collection-wide PATCH/DELETE before falling back to one per object
+        self.bulk_operations = opts.pop("bulk_operations", True)
+        # send only the members added to and removed from a changed to-many
+        # relation, falling back to the full list when the server rejects it
+        self.relation_deltas = opts.pop("relation_deltas", True)
 
         self.debug = opts.pop("debug", True)
         self.data_model_endpoint = opts.pop(
             "data_model_endpoint", "api/flask-restless-datamodel"
         )
+        # a module written by `restless-client generate`, its datamodel is used
+        # instead of fetching it and its classes become bases of the models
+        self.models = opts.pop("models", None)
+        # a file written by Client.snapshot to load objects from on start up,
+        # ignored when older than max_snapshot_age seconds
+        self.restore_from = opts.pop("restore_from", None)
+        self.max_snapshot_age = opts.pop("max_snapshot_age", None)
 
         # cereal lazer options
         # will return the raw data instead of raising an error when loading
@@ -89,6 +179,8 @@ class Options:
         # will try to coerce non registered classes into an emulated object
         self._serialize_naively_set_by_user = "serialize_naively" in opts
         self.serialize_naively = opts.pop("serialize_naively", False)
+        # "auto" negotiates the method/property payload format with the server
+        self.payload_format = opts.pop("payload_format", "auto")
 
         if "session" in opts:
             self.session = opts.pop("session")
@@ -109,17 +201,32 @@ class ServerProperty:
         if obj._rlc.is_new:
             raise UncallableProperty("Cannot call properties on new objects.")
 
+        value = self.cache.get(obj, self.attribute)
+        if value is not State.VOID:
+            return value
+
+        value = self.load(self.fetch(obj))
+        self.cache.set(obj, self.attribute, value)
+        return value
+
+    def fetch(self, obj):
         url = self.get_url(obj)
-        result = self.connection.request(url, http_method="get")
-        return self.cereal.loads(result["payload"])
+        return self.connection.request(url, http_method="get", **self.payload.accept())
+
+    def load(self, result):
+        return self.payload.loads(result)
 
     def get_url(self, obj):
         rlc = obj._rlc
         return "{}/{}/{}".format(rlc.property_url, rlc.pk_val, self.attribute)
 
     @property
-    def cereal(self):
-        return self.connection.client.cereal
+    def payload(self):
+        return self.connection.client.payload
+
+    @property
+    def cache(self):
+        return self.connection.client.property_cache
 
 
 class SettableServerProperty(ServerProperty):
@@ -134,14 +241,15 @@ class SettableServerProperty(ServerProperty):
 
     def __set__(self, obj, value):
         self.value[obj] = value
+        self.cache.expire(obj, self.attribute)
         obj._rlc.dirty.add(self.attribute)
 
     def _commit(self, obj):
         if self.value[obj] is State.VOID:
             return
         url = self.get_url(obj)
-        payload = self.cereal.dumps(self.value[obj])
-        self.connection.request(url, http_method="post", json=payload)
+        params = self.payload.dumps(self.value[obj], wrap=False)
+        self.connection.request(url, http_method="post", **params)
 
 
 class ClassConstructor:
@@ -189,6 +297,9 @@ class ClassConstructor:
                 )
 
         inherits = [self.opts.BaseObject]
+        generated = getattr(self.opts.models, name, None)
+        if generated is not None:
+            inherits.insert(0, generated)
         if details.get("polymorphic", {}).get("parent"):
             parent = self.client._classes[details["polymorphic"]["parent"]]
             inherits.insert(0, parent)
@@ -196,38 +307,53 @@ class ClassConstructor:
         klass.query = QueryFactory(self.client.connection, klass)
         self.client._classes[name] = klass
         setattr(self.client, name, klass)
+        self.client.serializer.compile(klass)
         register_serializer(klass)
 
 
 class Client:
     def __init__(self, url, **kwargs):
         self.base_url = url
-        self.state = State.LOADABLE
 
         self.registry = {}
+        self._registry_lock = threading.RLock()
+        # per model name, the watermark `sync` continues from
+        self.watermarks = {}
         self._classes = {}
 
         kwargs["base_url"] = url
         self.opts = Options(kwargs)
+        self.property_cache = self.opts.PropertyCache(self.opts)
 
         self.connection = self.opts.ConnectionClass(self, self.opts)
         self.serializer = self.opts.SerializeClass(self, self.opts)
         self.deserializer = self.opts.DeserializeClass(self, self.opts)
         self.constructor = self.opts.ConstructorClass(self, self.opts)
+        from cereal_lazer import Cereal
+
         self.cereal = Cereal(
             serialize_naively=self.opts.serialize_naively,
             raise_load_errors=self.opts.raise_load_errors,
         )
-        self.initialize()
         self.__loading_manager = LoadingManager(self)
+        self.initialize()
+        if self.opts.restore_from:
+            restore(self, self.opts.restore_from, self.opts.max_snapshot_age)
 
     def initialize(self):
-        url = urljoin(self.base_url, self.opts.data_model_endpoint)
-        res = self.connection.request(url)
+        if self.opts.models is not None:
+            res = deepcopy(self.opts.models.DATAMODEL)
+        else:
+            url = urljoin(self.base_url, self.opts.data_model_endpoint)
+            res = self.connection.request(url)
         meta = res.pop("FlaskRestlessDatamodel", {})
-        check_server_compatibility(meta.get("server_version"))
+        self.server_version = meta.get("server_version")
+        check_server_compatibility(self.server_version)
         if not self.opts._serialize_naively_set_by_user:
             self.cereal.serialize_naively = meta["serialize_naively"]
+        self.payload = negotiate_payload(
+            self.cereal, self.opts.payload_format, meta.get("payload_formats")
+        )
         delayed = {}
         for name, details in res.items():
             if details.get("polymorphic", {}).get("parent"):
@@ -241,12 +367,36 @@ class Client:
     def loading(self):
         return self.__loading_manager
 
+    @property
+    def state(self):
+        return self.__loading_manager.state
+
     @property
     def is_loading(self):
         return self.state is State.LOADING
 
     def _register(self, obj):
-        self.registry[self._key_from_object(obj)] = obj
+        with self._registry_lock:
+            self.registry[self._key_from_object(obj)] = obj
+
+    def _unregister(self, obj):
+        with self._registry_lock:
+            self.registry.pop(self._key_from_object(obj), None)
+
+    def _get_or_create(self, key, create):
+        """
+        Return the registered object for `key`, or create and register one.
+        Done under the registry lock so concurrent loads of the same object
+        share a single instance.
+        """
+        with self._registry_lock:
+            obj = self.registry.get(key) if key else None
+            if obj is not None:
+                return obj, False
+            obj = create()
+            if key:
+                self.registry[key] = obj
+            return obj, True
 
     def _key_from_object(self, obj):
         return "{}{}".format(obj.__class__.__name__, obj._rlc.pk_val)
@@ -256,7 +406,9 @@ class Client:
 
     def save(self, instance=None):
         if instance is None:
-            for obj in self.registry.values():
+            with self._registry_lock:
+                objects = list(self.registry.values())
+            for obj in objects:
                 if obj._rlc.dirty:
                     obj._rlc.save()
         else:
@@ -264,3 +416,44 @@ class Client:
 
     def refresh(self, instance):
         instance._rlc.refresh()
+
+    def refresh_all(self, objects, chunk_size=100):
+        """
+        Refresh `objects` with a request per `chunk_size` objects of a model,
+        instead of a request per object. Unsaved changes are discarded.
+        Returns the objects that no longer exist on the server.
+        """
+        by_class = {}
+        for obj in objects:
+            if not obj._rlc.is_new:
+                by_class.setdefault(type(obj), []).append(obj)
+        missing = []
+        for obj_class, objs in by_class.items():
+            missing.extend(self.connection.reload_all(obj_class, objs, chunk_size))
+            for obj in objs:
+                self.property_cache.expire(obj)
+        return missing
+
+    def sync(self, model, updated_field="updated_at", watermark_path=None):
+        """
+        Load the instances of `model` that changed since the last sync, based
+        on their `updated_field`. Changes are merged into loaded instances
+        without overwriting their unsaved changes. The watermark is kept in
+        `watermark_path` too, when given, so a next process can continue
+        from it. Returns the changed instances.
+        """
+        return sync(self, model, updated_field, watermark_path)
+
+    def snapshot(self, path):
+        """
+        Write the loaded objects to `path`, so another client can start with
+        them through `Client(..., restore_from=path)`.
+        """
+        snapshot(self, path)
+
+    def expire(self, instance, *properties):
+        """
+        Drop the cached values of the given server properties of `instance`,
+        or of all of them when none are given.
+        """
+        self.property_cache.expire(instance, *properties)
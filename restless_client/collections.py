@@ -1,6 +1,6 @@
 import logging
 
-from prettytable import PrettyTable
+from .utils import run_concurrently
 
 logger = logging.getLogger("restless-client")
 
@@ -12,6 +12,7 @@ def update_backref(remove):
             item = res or args[0]
             if not self.parent._rlc.client.is_loading:
                 self.parent._rlc.dirty.add(self.for_attr)
+                self._track(item, removed=remove)
             if self.for_attr:
                 self._update_backref(item, self.for_attr, remove=remove)
             return res
@@ -22,30 +23,142 @@ def update_backref(remove):
 
 
 class TypedList(list):
+    """
+    A to-many relation. Keeps an index of the identities of its items next to
+    the list, so membership checks, and the ones backref bookkeeping does, stay
+    constant time for large relations. Removing an item still scans the list
+    for its position, as a list has to, so removals stay linear.
+
+    Once marked saved, the items added and removed since are tracked as well,
+    so a save can send just those. Changes that can't be tracked that way,
+    like assigning to a slice, make the relation go back to being sent in full.
+    """
+
     def __init__(self, otype, parent, for_attr=None):
         self.type = otype
         self.parent = parent
         self.for_attr = for_attr
+        self._index = {}
+        # items added/removed since the last save, None when unknown
+        self._added = None
+        self._removed = None
 
-    @update_backref(remove=False)
-    def append(self, item):
+    def __contains__(self, item):
+        return id(item) in self._index
+
+    def _check_type(self, item):
         if not isinstance(item, self.type):
             cls_name = item.__class__.__name__
             msg = "Only {} can be added, {} provided"
             raise TypeError(msg.format(self.type.__name__, cls_name))
-        list.append(self, item)
+
+    def _indexed(self, item):
+        self._index[id(item)] = self._index.get(id(item), 0) + 1
+
+    def _unindexed(self, item):
+        count = self._index.pop(id(item)) - 1
+        if count:
+            self._index[id(item)] = count
+
+    def _reindex(self):
+        self._index = {}
+        for item in self:
+            self._indexed(item)
+
+    def _mark_saved(self):
+        """Track changes from here on, the current items being the saved ones."""
+        self._added = {}
+        self._removed = {}
+
+    def _track(self, item, removed=False):
+        if self._added is None:
+            return
+        changes, opposite = self._added, self._removed
+        if removed:
+            changes, opposite = opposite, changes
+        # removing an added item, or adding a removed one, undoes the change
+        if opposite.pop(id(item), None) is None:
+            changes[id(item)] = item
+
+    def _untrack(self):
+        if not self.parent._rlc.client.is_loading:
+            self._added = self._removed = None
+
+    def changes(self):
+        """
+        The items added and removed since the last save, or None when they
+        aren't known.
+        """
+        if self._added is None:
+            return None
+        return list(self._added.values()), list(self._removed.values())
+
+    @update_backref(remove=False)
+    def append(self, item):
+        self._check_type(item)
+        self._append_loaded(item)
 
     def extend(self, lst):
-        for i in lst:
-            self.append(i)
+        items = list(lst)
+        for item in items:
+            self._check_type(item)
+        for item in items:
+            self._append_loaded(item)
+        if not items:
+            return
+        if not self.parent._rlc.client.is_loading:
+            self.parent._rlc.dirty.add(self.for_attr)
+            for item in items:
+                self._track(item)
+        if self.for_attr:
+            for item in items:
+                self._update_backref(item, self.for_attr)
 
     @update_backref(remove=True)
     def remove(self, item):
-        list.remove(self, item)
+        if item not in self:
+            raise ValueError("{} is not in the list".format(item))
+        self._remove_loaded(item)
 
     @update_backref(remove=True)
     def pop(self):
-        return list.pop(self)
+        item = list.pop(self)
+        self._unindexed(item)
+        return item
+
+    def _append_loaded(self, item):
+        """Append without marking the relation dirty or updating backrefs."""
+        list.append(self, item)
+        self._indexed(item)
+
+    def _remove_loaded(self, item):
+        """Remove without marking the relation dirty, in linear time."""
+        list.remove(self, item)
+        self._unindexed(item)
+
+    def insert(self, index, item):
+        list.insert(self, index, item)
+        self._indexed(item)
+        self._untrack()
+
+    def clear(self):
+        list.clear(self)
+        self._index = {}
+        self._untrack()
+
+    def __setitem__(self, key, value):
+        list.__setitem__(self, key, value)
+        self._reindex()
+        self._untrack()
+
+    def __delitem__(self, key):
+        list.__delitem__(self, key)
+        self._reindex()
+        self._untrack()
+
+    def __iadd__(self, other):
+        self.extend(other)
+        return self
 
     def _update_backref(self, item, attr, remove=False):
         relhelper = self.parent._rlc.relhelper
@@ -61,11 +174,135 @@ class TypedList(list):
                     setattr(item, backref, value)
             else:
                 if backref in item._rlc.values:
-                    fn = list.remove if remove else list.append
                     lst = getattr(item, backref)
-                    if (self.parent not in lst) ^ remove:
+                    if isinstance(lst, LazyRelation):
+                        # refetched on next access rather than loaded now
+                        lst._reset()
+                    elif (self.parent not in lst) ^ remove:
                         logger.debug(msg)
-                        fn(lst, self.parent)
+                        if remove:
+                            lst._remove_loaded(self.parent)
+                        else:
+                            lst._append_loaded(self.parent)
+
+
+def materializing(name):
+    def method(self, *args, **kwargs):
+        return getattr(self._materialize(), name)(*args, **kwargs)
+
+    method.__name__ = name
+    return method
+
+
+class LazyRelation:
+    """
+    A to-many relation that is loaded page by page from the relation endpoint
+    of its parent, e.g. /api/formicarium/1/colonies, instead of from the
+    objects embedded in the parent. Only the pages that are accessed get
+    loaded, and `len()` uses the count reported by the server.
+
+    The first change to the relation loads it in full and replaces it with a
+    regular `TypedList` on its parent, which the change is then applied to.
+    """
+
+    def __init__(self, otype, parent, for_attr):
+        self.type = otype
+        self.parent = parent
+        self.for_attr = for_attr
+        self._reset()
+
+    def _reset(self):
+        self._pages = {}
+        self._num_results = None
+        self._total_pages = None
+        self._page_size = None
+        self._materialized = None
+
+    def _page(self, page):
+        if page not in self._pages:
+            connection = self.parent._rlc.connection
+            if self._page_size is None:
+                self._page_size = connection.page_sizes.get(self.type)
+            objects, raw = connection.load_relation_page(
+                self.parent, self.for_attr, page, self._page_size
+            )
+            self._pages[page] = objects
+            self._num_results = raw["num_results"]
+            self._total_pages = raw["total_pages"]
+        return self._pages[page]
+
+    def __len__(self):
+        if self._materialized is not None:
+            return len(self._materialized)
+        if self._num_results is None:
+            self._page(1)
+        return self._num_results
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __iter__(self):
+        if self._materialized is not None:
+            yield from self._materialized
+            return
+        page = 1
+        while True:
+            yield from self._page(page)
+            if page >= self._total_pages:
+                return
+            page += 1
+
+    def __getitem__(self, index):
+        if self._materialized is not None:
+            return self._materialized[index]
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if index < 0 or (self._num_results is not None and index >= len(self)):
+            raise IndexError("list index out of range")
+        if self._page_size is None:
+            self._page(1)
+        page, offset = divmod(index, self._page_size)
+        objects = self._page(page + 1)
+        if offset >= len(objects):
+            raise IndexError("list index out of range")
+        return objects[offset]
+
+    def __contains__(self, item):
+        return any(obj is item for obj in self)
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __repr__(self):
+        loaded = sum(len(objects) for objects in self._pages.values())
+        return "<LazyRelation {}.{} ({} loaded)>".format(
+            self.parent._rlc.class_name, self.for_attr, loaded
+        )
+
+    def _materialize(self):
+        if self._materialized is None:
+            client = self.parent._rlc.client
+            typed_list = client.opts.TypedListClass(
+                self.type, self.parent, self.for_attr
+            )
+            for item in self:
+                typed_list._append_loaded(item)
+            typed_list._mark_saved()
+            self.parent._rlc.values[self.for_attr] = typed_list
+            self._materialized = typed_list
+        return self._materialized
+
+    append = materializing("append")
+    extend = materializing("extend")
+    remove = materializing("remove")
+    pop = materializing("pop")
+    insert = materializing("insert")
+    clear = materializing("clear")
+    __setitem__ = materializing("__setitem__")
+    __delitem__ = materializing("__delitem__")
+    __iadd__ = materializing("__iadd__")
 
 
 # only used for printing puroposes, has no functional benefit
@@ -84,6 +321,63 @@ class ObjectCollection(list):
             raise ValueError("more than one result")
         return self.first()
 
+    def invoke(self, name, *args, concurrency=None, **kwargs):
+        """
+        Call the remote method `name` on every object, sending the calls
+        concurrently. Returns the results in the order of the collection, with
+        the exception in place of the result for calls that failed.
+        """
+        if concurrency is None:
+            concurrency = self.object_class._rlc.client.opts.concurrency
+        calls = [getattr(obj, name) for obj in self]
+        raw = run_concurrently(
+            lambda call: call.send(*args, **kwargs), calls, concurrency
+        )
+        results = []
+        for call, result in zip(calls, raw):
+            if not isinstance(result, Exception):
+                try:
+                    result = call.load(result)
+                except Exception as e:
+                    result = e
+            results.append(result)
+        return results
+
+    def prefetch_properties(self, *names, concurrency=None):
+        """
+        Fetch the server properties `names` of every object concurrently and
+        store them in the property cache, so reading them afterwards doesn't
+        hit the server. Values that fail to load are left to be fetched on
+        access, and properties configured not to be cached aren't fetched.
+        """
+        client = self.object_class._rlc.client
+        if concurrency is None:
+            concurrency = client.opts.concurrency
+        cache = client.property_cache
+        calls = [
+            (obj, name, getattr(obj.__class__, name))
+            for obj in self
+            if not obj._rlc.is_new
+            for name in names
+            if cache.prefetch_ttl_for(obj, name)
+        ]
+        raw = run_concurrently(lambda call: call[2].fetch(call[0]), calls, concurrency)
+        for (obj, name, prop), result in zip(calls, raw):
+            if isinstance(result, Exception):
+                logger.debug("Could not prefetch {}.{}: {}".format(obj, name, result))
+                continue
+            ttl = cache.prefetch_ttl_for(obj, name)
+            cache.set(obj, name, prop.load(result), ttl=ttl)
+        return self
+
+    def refresh(self, chunk_size=100):
+        """
+        Refresh every object with a request per `chunk_size` objects, see
+        `Client.refresh_all`. Returns the objects that no longer exist.
+        """
+        client = self.object_class._rlc.client
+        return client.refresh_all(self, chunk_size=chunk_size)
+
     def __getitem__(self, key):
         if isinstance(key, int):
             return list.__getitem__(self, key)
@@ -109,6 +403,8 @@ class ObjectCollection(list):
         headers.extend(sorted(data_columns))
         # then show relation columns
         headers.extend(sorted(relation_columns))
+        from prettytable import PrettyTable
+
         pt = PrettyTable(headers)
         pt.align = "l"
 
@@ -1,12 +1,20 @@
+import gzip
+import json
 import logging
 import pprint
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from functools import partial, wraps
 
 import requests
-from ordered_set import OrderedSet
+from requests.adapters import HTTPAdapter
 from requests.packages.urllib3.exceptions import InsecureRequestWarning
 
-from .utils import parse_custom_types, urljoin
+from .filter import encode_value
+from .hedging import hedged
+from .singleflight import SingleFlight, request_key
+from .utils import parse_custom_values, run_concurrently, urljoin
 
 requests.packages.urllib3.disable_warnings(InsecureRequestWarning)
 logger = logging.getLogger("restless-client")
@@ -19,6 +27,8 @@ def get_url(obj):
 def log(fn):
     @wraps(fn)
     def decorator(*args, **kwargs):
+        if not logger.isEnabledFor(logging.DEBUG):
+            return fn(*args, **kwargs)
         logger.debug("kwargs: {}".format(pprint.pformat(kwargs)))
         res = fn(*args, **kwargs)
         logger.debug("result: {}".format(pprint.pformat(res)))
@@ -51,38 +61,149 @@ def raise_on_locked(fn):
     return decorator
 
 
+class ConnectionStats:
+    """
+    Bytes sent and received by a connection, both as they went over the wire
+    and after (before) decompressing (compressing) them.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.bytes_sent = 0
+        self.bytes_sent_uncompressed = 0
+        self.bytes_received = 0
+        self.bytes_received_uncompressed = 0
+
+    def record(self, response, uncompressed_body=None):
+        body = response.request.body or b""
+        content = len(response.content)
+        with self.lock:
+            self.requests += 1
+            self.bytes_sent += len(body)
+            self.bytes_sent_uncompressed += uncompressed_body or len(body)
+            self.bytes_received += wire_size(response, content)
+            self.bytes_received_uncompressed += content
+
+
+def wire_size(response, content):
+    try:
+        # urllib3 counts the bytes it read before decoding them
+        return int(response.raw.tell()) or content
+    except Exception:
+        pass
+    if response.headers.get("Content-Encoding"):
+        return int(response.headers.get("Content-Length", content))
+    return content
+
+
 class Connection:
     def __init__(self, client, opts):
         self.client = client
         self.session = opts.session
         self.opts = opts
+        self.stats = ConnectionStats()
+        # concurrent identical GETs share a single request and its result
+        self.in_flight = SingleFlight() if opts.coalesce_requests else None
+        self.page_sizes = opts.PageSizeTuner(opts)
+        # endpoints that turned out not to allow PATCH/DELETE on the collection
+        self.bulk_unsupported = set()
+        # endpoints that rejected add/remove updates of to-many relations
+        self.deltas_unsupported = set()
+        # runs requests submitted in the background, e.g. remote method calls
+        self.executor = ThreadPoolExecutor(max_workers=opts.concurrency)
+        # duplicates slow GETs, see HedgePolicy. Hedges get their own threads
+        # so they can't queue up behind the requests they are meant to speed up
+        self.hedging = None
+        if opts.hedge:
+            self.hedging = opts.HedgePolicy(opts)
+            self.hedge_executor = ThreadPoolExecutor(max_workers=2 * opts.concurrency)
+        if opts.pool_maxsize:
+            adapter = HTTPAdapter(
+                pool_connections=opts.pool_connections, pool_maxsize=opts.pool_maxsize
+            )
+            self.session.mount("http://", adapter)
+            self.session.mount("https://", adapter)
 
     @raise_on_locked
     @lock_loading
     def load_query(self, obj_class, single=False, **kwargs):
-        raw = self.request(obj_class._rlc.base_url, params=kwargs)
-
         if single:
+            raw = self.request(obj_class._rlc.base_url, params=kwargs)
             return obj_class(**raw)
 
+        if not kwargs.get("results_per_page"):
+            kwargs["results_per_page"] = self.page_sizes.get(obj_class)
+
+        from ordered_set import OrderedSet
+
         # iterate over pages
-        objects = raw["objects"]
+        raw = self.load_page(obj_class, kwargs)
+        objects = list(raw["objects"])
         for page in range(2, raw["total_pages"] + 1):
             kwargs["page"] = page
-            objects.extend(
-                self.request(obj_class._rlc.base_url, params=kwargs)["objects"]
-            )
+            objects.extend(self.load_page(obj_class, kwargs)["objects"])
 
         return self.opts.CollectionClass(
             obj_class, OrderedSet([obj_class(**obj) for obj in objects])
         )
 
+    @raise_on_locked
+    @lock_loading
+    def load_batch(self, obj_class, **kwargs):
+        """
+        Load a single page of a query, returning the instances along with the
+        raw response so the caller can decide how to fetch the next batch.
+        """
+        if not kwargs.get("results_per_page"):
+            kwargs["results_per_page"] = self.page_sizes.get(obj_class)
+        raw = self.load_page(obj_class, kwargs)
+        return [obj_class(**obj) for obj in raw["objects"]], raw
+
+    def load_page(self, obj_class, params):
+        nbytes = [0]
+
+        def measure(response, *args, **kwargs):
+            nbytes[0] = len(response.content)
+
+        started = time.perf_counter()
+        raw = self.request(
+            obj_class._rlc.base_url,
+            params=params,
+            hooks={"response": measure},
+        )
+        if not nbytes[0]:
+            # the page was shared with an identical in-flight request
+            return raw
+        self.page_sizes.observe(
+            obj_class,
+            requested=params["results_per_page"],
+            received=len(raw["objects"]),
+            nbytes=nbytes[0],
+            seconds=time.perf_counter() - started,
+            last_page=raw["page"] >= raw["total_pages"],
+        )
+        return raw
+
     @raise_on_locked
     @lock_loading
     def load(self, obj_class, obj_id):
         raw = self.request(urljoin(obj_class._rlc.base_url, str(obj_id)))
         return obj_class(**raw)
 
+    @raise_on_locked
+    @lock_loading
+    def load_relation_page(self, obj, attribute, page, page_size):
+        """
+        Load a page of the to-many relation `attribute` of `obj` from its
+        relation endpoint. Returns the related instances and the raw response.
+        """
+        url = urljoin(obj._rlc.base_url, str(obj._rlc.pk_val), attribute)
+        params = {"page": page, "results_per_page": page_size}
+        raw = self.request(url, params=params)
+        rel_model = obj._rlc.relhelper.model(attribute)
+        return [rel_model(**rel_obj) for rel_obj in raw["objects"]], raw
+
     @raise_on_locked
     @lock_loading
     def reload(self, obj):
@@ -92,6 +213,57 @@ class Connection:
         obj._load(raw)
         return obj
 
+    @raise_on_locked
+    @lock_loading
+    def reload_all(self, obj_class, objects, chunk_size):
+        """
+        Reload `objects` of `obj_class` with an `in` query on their primary
+        keys per chunk of `chunk_size` objects, sending the chunks
+        concurrently. Loaded values replace the current values and unsaved
+        changes of the objects in place. Returns the objects the server no
+        longer has.
+        """
+        pk_name = obj_class._rlc.pk_name
+        pk = getattr(obj_class, pk_name)
+        chunks = [
+            objects[i : i + chunk_size] for i in range(0, len(objects), chunk_size)
+        ]
+        queries = [
+            obj_class.query.filter(pk.in_([o._rlc.pk_val for o in chunk]))
+            for chunk in chunks
+        ]
+        results = run_concurrently(
+            lambda query: self._load_all_raw(obj_class, query, chunk_size),
+            queries,
+            self.opts.concurrency,
+        )
+        loaded = {}
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+            loaded.update((raw[pk_name], raw) for raw in result)
+
+        missing = []
+        for obj in objects:
+            raw = loaded.get(obj._rlc.pk_val)
+            if raw is None:
+                missing.append(obj)
+                continue
+            obj._rlc.dirty = set()
+            obj._load(raw)
+        return missing
+
+    def _load_all_raw(self, obj_class, query, page_size):
+        params = {"q": query._get_query(), "results_per_page": page_size}
+        raw = self.request(obj_class._rlc.base_url, params=params)
+        objects = list(raw["objects"])
+        # the server caps the page size, the chunk may not fit in one page
+        for page in range(2, raw["total_pages"] + 1):
+            params["page"] = page
+            raw = self.request(obj_class._rlc.base_url, params=params)
+            objects.extend(raw["objects"])
+        return objects
+
     @lock_loading
     def create(self, obj, object_dict=None):
         object_dict = object_dict or self.client.serializer.serialize_dirty(obj)
@@ -106,14 +278,31 @@ class Connection:
 
     @lock_loading
     def update(self, obj, object_dict=None):
-        object_dict = object_dict or self.client.serializer.serialize_dirty(obj)
+        serializer = self.client.serializer
+        changes = {}
+        if not object_dict:
+            if self._deltas_allowed(obj._rlc.base_url):
+                changes = serializer.relation_changes(obj)
+            object_dict = serializer.serialize_dirty(obj, changes)
 
         self._push_settable_propperties(obj, object_dict)
         if not object_dict:
             return
 
         url = urljoin(obj._rlc.base_url, str(obj._rlc.pk_val))
-        self.request(url, http_method="put", json=object_dict)
+        try:
+            self.request(url, http_method="put", json=object_dict)
+        except requests.HTTPError as e:
+            if not changes or e.response is None or e.response.status_code != 400:
+                raise e
+            # the server doesn't understand add/remove, send the full lists
+            logger.debug("{} rejected relation changes".format(url))
+            object_dict = serializer.serialize_dirty(obj)
+            self.request(url, http_method="put", json=object_dict)
+            self.deltas_unsupported.add(obj._rlc.base_url)
+
+    def _deltas_allowed(self, url):
+        return self.opts.relation_deltas and url not in self.deltas_unsupported
 
     def _push_settable_propperties(self, obj, object_dict):
         for property_name in obj._rlc.dirty_properties:
@@ -125,15 +314,172 @@ class Connection:
             url = urljoin(obj._rlc.base_url, str(obj._rlc.pk_val))
             self.request(url, http_method="delete")
 
+    def update_query(self, obj_class, values, query, objects=None):
+        """
+        Apply `values` to every instance matching `query` in a single
+        collection-wide PATCH. Servers that don't allow patching many instances
+        get one PUT per object instead, sent concurrently. Matching instances
+        that were loaded are updated in place. Returns the number of modified
+        instances.
+        """
+        url = obj_class._rlc.base_url
+        object_dict = {
+            attr: self.client.serializer.clean(attr, value, autosave=True)
+            for attr, value in values.items()
+        }
+        count = None
+        if self._bulk_allowed(url):
+            try:
+                payload = json.dumps(dict(object_dict, q=query), default=encode_value)
+                headers = {"Content-Type": "application/json"}
+                r = self.request(
+                    url, http_method="patch", data=payload, headers=headers
+                )
+                count = r["num_modified"]
+            except requests.HTTPError as e:
+                self._raise_unless_unsupported(url, e)
+
+        if count is None:
+            objects = self._matching(obj_class, query, objects)
+
+            def update(obj):
+                obj_url = urljoin(url, str(obj._rlc.pk_val))
+                self.request(obj_url, http_method="put", json=object_dict)
+
+            count = self._for_each(update, objects)
+
+        if objects:
+            self._apply_values(objects, values)
+        return count
+
+    def delete_query(self, obj_class, query, objects=None):
+        """
+        Delete every instance matching `query` with a single collection-wide
+        DELETE, falling back to one DELETE per object. Matching instances that
+        were loaded are removed from the registry. Returns the number of
+        deleted instances.
+        """
+        url = obj_class._rlc.base_url
+        count = None
+        if self._bulk_allowed(url):
+            try:
+                params = {"q": json.dumps(query, default=encode_value)}
+                r = self.request(url, http_method="delete", params=params)
+                count = r["num_deleted"]
+            except requests.HTTPError as e:
+                # flask-restless answers 404 when nothing matched
+                if e.response is not None and e.response.status_code == 404:
+                    count = 0
+                else:
+                    self._raise_unless_unsupported(url, e)
+
+        if count is None:
+            objects = self._matching(obj_class, query, objects)
+
+            def delete(obj):
+                obj_url = urljoin(url, str(obj._rlc.pk_val))
+                self.request(obj_url, http_method="delete")
+
+            count = self._for_each(delete, objects)
+
+        for obj in objects or []:
+            self.client._unregister(obj)
+        return count
+
+    def synchronize_update(self, objects, unknown, values):
+        """
+        Apply `values` to the loaded `objects` a query update matched, and
+        expire them on the `unknown` objects, which may or may not have
+        matched. Expired values are reloaded on their next read.
+        """
+        self._apply_values(objects, values)
+        for obj in unknown:
+            for attr in values:
+                if attr not in obj._rlc.dirty:
+                    obj._rlc.values.pop(attr, None)
+
+    def _bulk_allowed(self, url):
+        return self.opts.bulk_operations and url not in self.bulk_unsupported
+
+    def _raise_unless_unsupported(self, url, error):
+        if error.response is None or error.response.status_code != 405:
+            raise error
+        logger.debug("{} does not allow bulk operations".format(url))
+        self.bulk_unsupported.add(url)
+
+    def _matching(self, obj_class, query, objects):
+        if objects is None:
+            q = json.dumps(query, default=encode_value)
+            objects = self.load_query(obj_class, q=q)
+        return objects
+
+    def _for_each(self, fn, objects):
+        results = run_concurrently(fn, objects, self.opts.concurrency)
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+        return len(results)
+
+    def _apply_values(self, objects, values):
+        with self.client.loading:
+            for obj in objects:
+                for attr, value in values.items():
+                    if attr in obj._rlc._relations:
+                        # relations are reloaded on their next access
+                        obj._rlc.values.pop(attr, None)
+                    else:
+                        setattr(obj, attr, value)
+
     @log
     def request(self, url, **kwargs):
+        method = kwargs.get("http_method", "get")
+        if method != "get" or self.in_flight is None:
+            return self._request(url, **kwargs)
+        key = request_key(
+            method,
+            url,
+            kwargs.get("params"),
+            kwargs.get("headers"),
+            kwargs.get("raw", False),
+        )
+        return self.in_flight.do(key, self._request, url, **kwargs)
+
+    def _request(self, url, **kwargs):
         method = kwargs.pop("http_method", "get")
+        raw = kwargs.pop("raw", False)
+        uncompressed_body = self._compress_body(kwargs)
         fn = getattr(self.session, method)
-        r = fn(url, **kwargs)
-        if method == "delete":
+        if method == "get" and self.hedging:
+            r = hedged(self.hedging, self.hedge_executor, fn, url, **kwargs)
+        else:
+            r = fn(url, **kwargs)
+        self.stats.record(r, uncompressed_body)
+        if method == "delete" and not r.content:
             return
+        if raw and not r.headers.get("Content-Type", "").startswith("application/json"):
+            return r.content
 
         result = r.json(
-            object_hook=partial(parse_custom_types, **kwargs),
+            object_hook=partial(parse_custom_values, **kwargs),
         )
         return result
+
+    def _compress_body(self, kwargs):
+        """
+        Gzip a JSON body larger than `compress_requests_above` bytes, for
+        servers that accept a gzip Content-Encoding. Returns the size of the
+        uncompressed body when it was compressed.
+        """
+        threshold = self.opts.compress_requests_above
+        if threshold is None or kwargs.get("json") is None:
+            return None
+        body = json.dumps(kwargs["json"]).encode("utf-8")
+        if len(body) < threshold:
+            return None
+        kwargs.pop("json")
+        kwargs["data"] = gzip.compress(body)
+        kwargs["headers"] = dict(
+            kwargs.get("headers") or {},
+            **{"Content-Type": "application/json", "Content-Encoding": "gzip"}
+        )
+        return len(body)
@@ -38,7 +38,10 @@ class BaseSession(requests.Session):
         return self.validate_response(super().request(*args, **kwargs))
 
     def validate_response(self, res):
-        # raise an exception if status is 400 or up
+        # raise an exception if status is 400 or up, only error bodies are
+        # decoded here so successful responses are parsed once by the caller
+        if res.status_code < 400:
+            return res
         try:
             json_data = res.json()
         except Exception:
@@ -0,0 +1,160 @@
+import base64
+import gzip
+import hashlib
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import timedelta
+
+import requests
+from requests.hooks import dispatch_hook
+from requests.structures import CaseInsensitiveDict
+
+FIXTURE_VERSION = 1
+
+
+class ReplayMissError(Exception):
+    pass
+
+
+def body_digest(body, headers=None):
+    if body is None:
+        return None
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    if headers and headers.get("Content-Encoding") == "gzip":
+        # gzip stores the time it compressed at, compare the content instead
+        body = gzip.decompress(body)
+    return hashlib.sha1(body).hexdigest()
+
+
+def exchange_key(method, url, body, headers=None):
+    return method.upper(), url, body_digest(body, headers)
+
+
+class RecordingSession(requests.Session):
+    """
+    Sends requests through `session` and records every request/response pair,
+    along with how long it took, so it can be replayed by a `ReplaySession`.
+    The recording is written to `path` on `save()` or when used as a context
+    manager.
+
+    Response bodies are stored as they are, including any credentials or
+    personal data they contain.
+    """
+
+    def __init__(self, session, path):
+        super().__init__()
+        self.session = session
+        self.path = path
+        # share the session state the client configures
+        self.headers = session.headers
+        self.adapters = session.adapters
+        self.exchanges = []
+        self.lock = threading.Lock()
+
+    def request(self, method, url, **kwargs):
+        hooks = dict(kwargs.get("hooks") or {})
+        response_hooks = hooks.get("response", [])
+        if callable(response_hooks):
+            response_hooks = [response_hooks]
+        # recorded from a hook, so responses the session raises on are kept too
+        hooks["response"] = [self.record] + list(response_hooks)
+        kwargs["hooks"] = hooks
+        return self.session.request(method, url, **kwargs)
+
+    def record(self, response, *args, **kwargs):
+        request = response.request
+        exchange = {
+            "method": request.method,
+            "url": request.url,
+            "body": body_digest(request.body, request.headers),
+            "status": response.status_code,
+            "reason": response.reason,
+            "headers": dict(response.headers),
+            "content": base64.b64encode(response.content).decode("ascii"),
+            "elapsed": response.elapsed.total_seconds(),
+        }
+        with self.lock:
+            self.exchanges.append(exchange)
+
+    def save(self):
+        with self.lock:
+            fixture = {"version": FIXTURE_VERSION, "exchanges": list(self.exchanges)}
+        with open(self.path, "w") as fh:
+            json.dump(fixture, fh)
+
+    def close(self):
+        self.save()
+        self.session.close()
+
+
+class ReplaySession(requests.Session):
+    """
+    Answers requests from a recording made by `RecordingSession`, without any
+    network access. Identical requests are answered in the order they were
+    recorded, repeating the last answer once the recording runs out.
+
+    `latency` simulates the network: `True` waits as long as the recorded
+    request took, a number waits that many seconds per request.
+    """
+
+    def __init__(self, path, latency=None):
+        super().__init__()
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.exchanges = defaultdict(deque)
+        with open(path) as fh:
+            fixture = json.load(fh)
+        for exchange in fixture["exchanges"]:
+            key = (exchange["method"], exchange["url"], exchange["body"])
+            self.exchanges[key].append(exchange)
+
+    def request(
+        self, method, url, params=None, data=None, headers=None, json=None, **kwargs
+    ):
+        request = requests.Request(
+            method=method.upper(),
+            url=url,
+            params=params,
+            data=data,
+            headers=headers,
+            json=json,
+        )
+        prepared = self.prepare_request(request)
+        exchange = self.next_exchange(
+            exchange_key(prepared.method, prepared.url, prepared.body, prepared.headers)
+        )
+        if self.latency is True:
+            time.sleep(exchange["elapsed"])
+        elif self.latency:
+            time.sleep(self.latency)
+
+        response = self.build_response(prepared, exchange)
+        hooks = kwargs.get("hooks") or {}
+        response = dispatch_hook("response", hooks, response)
+        response.raise_for_status()
+        return response
+
+    def next_exchange(self, key):
+        with self.lock:
+            exchanges = self.exchanges.get(key)
+            if not exchanges:
+                raise ReplayMissError("No recorded response for {} {}".format(*key))
+            if len(exchanges) > 1:
+                return exchanges.popleft()
+            return exchanges[0]
+
+    def build_response(self, prepared, exchange):
+        response = requests.Response()
+        response.request = prepared
+        response.url = prepared.url
+        response.status_code = exchange["status"]
+        response.reason = exchange["reason"]
+        response.headers = CaseInsensitiveDict(exchange["headers"])
+        # the recorded content was already decoded
+        response.headers.pop("Content-Encoding", None)
+        response._content = base64.b64decode(exchange["content"])
+        response.elapsed = timedelta(seconds=exchange["elapsed"])
+        return response
@@ -1,7 +1,11 @@
 import json
 import logging
+import operator
+from datetime import date, datetime
+from numbers import Number
 
 from .inspect import inspect
+from .utils import State
 
 logger = logging.getLogger("restless-client")
 
@@ -19,6 +23,70 @@ for a, b in INVERT_OPERATORS:
     INVERT_MAPPING[a] = b
     INVERT_MAPPING[b] = a
 
+# the operators a filter can be evaluated with against a loaded instance
+OPERATORS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "in": lambda value, items: value in items,
+    "not_in": lambda value, items: value not in items,
+    "is_null": lambda value, _: value is None,
+    "is_not_null": lambda value, _: value is not None,
+}
+
+
+class Unevaluable(Exception):
+    pass
+
+
+def evaluate(raw_filter, obj):
+    """
+    Evaluate a raw filter against the loaded values of `obj`. Raises
+    `Unevaluable` when the outcome can't be told locally, e.g. for filters on
+    relations, values that aren't loaded or have unsaved changes, or values
+    of another type than the attribute.
+    """
+    if "and" in raw_filter:
+        return all(evaluate(f, obj) for f in raw_filter["and"])
+    if "or" in raw_filter:
+        return any(evaluate(f, obj) for f in raw_filter["or"])
+    if "not" in raw_filter:
+        return not evaluate(raw_filter["not"], obj)
+
+    rlc = obj._rlc
+    name, op = raw_filter.get("name"), OPERATORS.get(raw_filter.get("op"))
+    if op is None or name not in rlc._attributes or name in rlc.dirty:
+        raise Unevaluable()
+    value = rlc.values.get(name, State.VOID)
+    if value is State.VOID or rlc.pending is not None:
+        raise Unevaluable()
+    val = raw_filter.get("val")
+    items = val if raw_filter["op"] in ("in", "not_in") else [val]
+    if not all(comparable(value, item) for item in items):
+        raise Unevaluable()
+    try:
+        return op(value, val)
+    except TypeError:
+        raise Unevaluable()
+
+
+def comparable(value, other):
+    if value is None or other is None:
+        return True
+    if isinstance(value, Number) and isinstance(other, Number):
+        return True
+    # e.g. a datetime attribute is compared with a string on the server
+    return type(value) is type(other)
+
+
+def encode_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError("{} is not JSON serializable".format(value.__class__.__name__))
+
 
 def is_filter_result(f, operator):
     assert isinstance(f, (BooleanResult, ComparisonResult)), "Wrong use of {}".format(
@@ -26,6 +94,11 @@ def is_filter_result(f, operator):
     )
 
 
+def check_synchronize_session(synchronize_session):
+    if synchronize_session not in ("evaluate", "fetch", False):
+        raise ValueError("Unknown synchronize_session {}".format(synchronize_session))
+
+
 class FilterCollection(list):
     def to_raw_filter(self):
         return [i.to_raw_filter() for i in self]
@@ -149,6 +222,7 @@ class Query:
         self.connection = connection
         self.cls = cls
         self._query = {}
+        self._page_size = None
 
     def filter(self, *queries):  # noqa A003
         q = []
@@ -176,6 +250,11 @@ class Query:
         self._query["offset"] = offset
         return self
 
+    def page_size(self, page_size):
+        assert int(page_size) > 0
+        self._page_size = page_size
+        return self
+
     def order_by(self, **kwargs):
         order_by = []
         for attr, direction in kwargs.items():
@@ -213,12 +292,146 @@ class Query:
             if "Multiple results found" in str(e):
                 raise e
 
-    def all(self):  # noqa A003
+    def all(self, pagination="page", key=None):  # noqa A003
+        if pagination == "keyset":
+            objects = list(self.iter(keyset=True, key=key))
+            return self.connection.opts.CollectionClass(self.cls, objects)
+        if pagination != "page":
+            raise ValueError("Unknown pagination {}".format(pagination))
         kwargs = {}
         if self._query:
             kwargs["q"] = self._get_query()
+        if self._page_size:
+            kwargs["results_per_page"] = self._page_size
         return self.connection.load_query(self.cls, **kwargs)
 
+    def iter(self, keyset=False, key=None):  # noqa A003
+        """
+        Lazily iterate over the results, loading one page at a time.
+
+        With `keyset`, results are ordered by `key` (the primary key by default)
+        and every page is requested with a `key > last_seen` filter instead of a
+        page number, so deep pages stay cheap and rows aren't skipped or
+        duplicated when the data changes mid-scan. `key` must be unique.
+        """
+        if keyset:
+            pages = self._keyset_pages(key or self.cls._rlc.pk_name)
+        else:
+            pages = self._numbered_pages()
+        for objects in pages:
+            yield from objects
+
+    def _numbered_pages(self):
+        # a page size tuned between pages would make the pages overlap
+        page_size = self._page_size or self.connection.page_sizes.get(self.cls)
+        kwargs = {"results_per_page": page_size}
+        if self._query:
+            kwargs["q"] = self._get_query()
+        page, total_pages = 1, 1
+        while page <= total_pages:
+            objects, raw = self.connection.load_batch(self.cls, page=page, **kwargs)
+            total_pages = raw["total_pages"]
+            page += 1
+            yield objects
+
+    def _keyset_pages(self, key):
+        if "order_by" in self._query:
+            raise ValueError("Keyset pagination can only be ordered by its key")
+        query = dict(self._query, order_by=[{"field": key, "direction": "asc"}])
+        filters = query.pop("filters", [])
+        remaining = query.pop("limit", None)
+        page_size = self._page_size or self.connection.page_sizes.get(self.cls)
+
+        last_seen = None
+        while remaining is None or remaining > 0:
+            if last_seen is not None:
+                seek = getattr(self.cls, key) > last_seen
+                query["filters"] = filters + [seek.to_raw_filter()]
+                query.pop("offset", None)
+            elif filters:
+                query["filters"] = filters
+            per_page = page_size if remaining is None else min(page_size, remaining)
+            objects, raw = self.connection.load_batch(
+                self.cls, q=self._get_query(query), results_per_page=per_page
+            )
+            if not objects:
+                return
+            yield objects
+            if raw["total_pages"] <= 1:
+                return
+            if remaining is not None:
+                remaining -= len(objects)
+            last_seen = raw["objects"][-1][key]
+
+    def update(self, values, synchronize_session="evaluate"):
+        """
+        Update every instance matching the query in a single request and
+        return the number of modified instances.
+
+        With `synchronize_session="evaluate"` the filters are evaluated against
+        the loaded instances, which are updated in place without loading
+        anything. Loaded instances the filters can't be evaluated for get the
+        updated values expired, so they're reloaded on their next read.
+        `"fetch"` loads the matching instances first and updates those, and
+        `False` leaves the registry alone.
+        """
+        check_synchronize_session(synchronize_session)
+        if synchronize_session == "fetch":
+            objects = self.all()
+            return self.connection.update_query(self.cls, values, self._query, objects)
+        matched, unknown = self._loaded_matches(synchronize_session)
+        count = self.connection.update_query(self.cls, values, self._query)
+        self.connection.synchronize_update(matched, unknown, values)
+        return count
+
+    def delete(self, synchronize_session="evaluate"):
+        """
+        Delete every instance matching the query in a single request and return
+        the number of deleted instances.
+
+        With `synchronize_session="evaluate"` the loaded instances matching the
+        filters are removed from the registry, along with the ones the filters
+        can't be evaluated for. `"fetch"` loads the matching instances first
+        and removes those, and `False` leaves the registry alone.
+        """
+        check_synchronize_session(synchronize_session)
+        if synchronize_session == "fetch":
+            return self.connection.delete_query(self.cls, self._query, self.all())
+        matched, unknown = self._loaded_matches(synchronize_session)
+        count = self.connection.delete_query(self.cls, self._query)
+        client = self.cls._rlc.client
+        for obj in matched + unknown:
+            client._unregister(obj)
+        return count
+
+    def _loaded_matches(self, synchronize_session):
+        """
+        Split the loaded instances of the queried class into the ones matching
+        the filters of the query and the ones that can't be told locally.
+        """
+        if synchronize_session != "evaluate":
+            return [], []
+        client = self.cls._rlc.client
+        with client._registry_lock:
+            objects = [
+                obj
+                for obj in client.registry.values()
+                if isinstance(obj, self.cls) and not obj._rlc.is_new
+            ]
+        if set(self._query) - {"filters"}:
+            # e.g. a limit selects rows the filters alone don't tell
+            return [], objects
+
+        matched, unknown = [], []
+        raw_filter = {"and": self._query.get("filters", [])}
+        for obj in objects:
+            try:
+                if evaluate(raw_filter, obj):
+                    matched.append(obj)
+            except Unevaluable:
+                unknown.append(obj)
+        return matched, unknown
+
     def get(self, oid):
         registry_id = "{}{}".format(self.cls.__name__, oid)
         meta = inspect(self.cls)
@@ -226,5 +439,5 @@ class Query:
             return meta.client.registry[registry_id]
         return self.connection.load(self.cls, oid)
 
-    def _get_query(self):
-        return json.dumps(self._query)
+    def _get_query(self, query=None):
+        return json.dumps(self._query if query is None else query, default=encode_value)
@@ -0,0 +1,82 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, wait
+
+logger = logging.getLogger("restless-client")
+
+# below this many observed latencies the delay is too unreliable to hedge on
+MIN_SAMPLES = 20
+
+
+class HedgePolicy:
+    """
+    Decides when a slow GET gets a duplicate request.
+
+    A hedge is sent once a request has been outstanding for longer than the
+    `hedge_percentile` of recently observed latencies. To keep hedging from
+    amplifying load on a struggling server, no more than `hedge_budget` (a
+    fraction of all hedgeable requests) can be hedges.
+    """
+
+    def __init__(self, opts):
+        self.percentile = opts.hedge_percentile
+        self.budget = opts.hedge_budget
+        self.min_delay = opts.hedge_min_delay
+        self.latencies = deque(maxlen=opts.hedge_window)
+        self.requests = 0
+        self.hedges = 0
+        self.lock = threading.Lock()
+
+    def delay(self):
+        with self.lock:
+            self.requests += 1
+            samples = sorted(self.latencies)
+        if len(samples) < MIN_SAMPLES:
+            return None
+        index = min(int(len(samples) * self.percentile), len(samples) - 1)
+        return max(samples[index], self.min_delay)
+
+    def record(self, seconds):
+        with self.lock:
+            self.latencies.append(seconds)
+
+    def acquire(self):
+        with self.lock:
+            if self.hedges >= self.requests * self.budget:
+                return False
+            self.hedges += 1
+            return True
+
+
+def hedged(policy, executor, fn, *args, **kwargs):
+    """
+    Call `fn` on `executor` and, if it hasn't answered within the policy's
+    delay, call it a second time and return whichever answers first. The
+    slower call can't be cancelled; it completes in the background and its
+    result is dropped.
+    """
+    delay = policy.delay()
+    started = time.perf_counter()
+    if delay is None:
+        # too few latencies to hedge on yet, skip the hop to the executor
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            policy.record(time.perf_counter() - started)
+    pending = [executor.submit(fn, *args, **kwargs)]
+    done, _ = wait(pending, timeout=delay)
+    if not done and policy.acquire():
+        logger.debug("Hedging request after {:.3f}s".format(delay))
+        pending.append(executor.submit(fn, *args, **kwargs))
+
+    while True:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        future = done.pop()
+        pending.remove(future)
+        # a failed attempt only counts if there's no other attempt left
+        if future.exception() is None or not pending:
+            break
+    policy.record(time.perf_counter() - started)
+    return future.result()
@@ -2,6 +2,8 @@ import inspect as p_inspect
 import logging
 from itertools import chain
 
+from .collections import TypedList
+
 logger = logging.getLogger("restless-client")
 
 
@@ -57,6 +59,8 @@ class InstanceState:
         self.meta = instance._rlc
         self.dirty = set()
         self.values = {}
+        # the raw values of a reference stub, loaded on first read
+        self.pending = None
 
     def __getattribute__(self, attrib):
         meta = super().__getattribute__("meta")
@@ -85,6 +89,12 @@ class InstanceState:
                 props.add(property_name)
         return props
 
+    def hydrate(self):
+        pending = self.pending
+        if pending is not None:
+            with self.client.loading:
+                self.instance._load(pending)
+
     def delete(self):
         self.connection.delete(self.instance)
 
@@ -95,10 +105,15 @@ class InstanceState:
             self.connection.update(self.instance)
         else:
             logger.debug("No action needed")
+        for value in self.values.values():
+            if isinstance(value, TypedList):
+                value._mark_saved()
         self.dirty = set()
+        self.client.property_cache.expire(self.instance)
 
     def refresh(self):
         self.client.connection.reload(self.instance)
+        self.client.property_cache.expire(self.instance)
 
 
 def inspect(obj):
@@ -2,16 +2,22 @@ import logging
 from datetime import date, datetime
 from itertools import chain
 
-import crayons
-
+from .collections import LazyRelation, TypedList
 from .types import cast_type, object_hook_emit
 from .utils import State, pretty_logger
 
 logger = logging.getLogger("restless-client")
 LOAD_MSG = "loading {}.{} with value {}"
+# values of these types are sent as they are
+SCALAR_TYPES = (str, int, float, bool, type(None))
+DATE_TYPES = ("date", "datetime", "utcdatetime")
 
 
 def log(o, a, v, attr_color="red"):
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    import crayons
+
     logger.info(
         LOAD_MSG.format(
             crayons.yellow(o.__class__.__name__, always=True, bold=True),
@@ -42,13 +48,75 @@ class ObjectSerializer:
     def __init__(self, client, opts):
         self.client = client
         self.opts = opts
+        # per model class: a cleaner per field and the fields sent on save
+        self.compiled = {}
+
+    def compile(self, model):  # noqa A003
+        """
+        Build the cleaners for every field of `model` up front, based on the
+        attribute types and relation kinds of the datamodel, so serializing an
+        instance doesn't have to probe the type of every value. The output is
+        identical to the one of `clean`.
+        """
+        meta = model._rlc
+        cleaners = {}
+        for attr, attr_type in meta._attributes.items():
+            if attr_type in DATE_TYPES:
+                cleaners[attr] = self._date_cleaner(attr)
+            else:
+                cleaners[attr] = self._scalar_cleaner(attr)
+        for rel in meta._relations:
+            if meta.relhelper.is_scalar(rel):
+                cleaners[rel] = self._reference_cleaner(rel)
+            else:
+                cleaners[rel] = self._references_cleaner(rel)
+        fields = tuple(
+            f for f in chain(meta.attributes(), meta.relations()) if f != meta.pk_name
+        )
+        self.compiled[model] = (cleaners, fields)
 
     def serialize(self, obj):
+        if obj.__class__ in self.compiled:
+            return self._raw_serialize(obj, self.compiled[obj.__class__][1])
         to_serialize = list(chain(obj._rlc.attributes(), obj._rlc.relations()))
         return self._serialize(obj, to_serialize)
 
-    def serialize_dirty(self, obj):
-        return self._serialize(obj, obj._rlc.dirty, autosave=True)
+    def serialize_dirty(self, obj, changes=None):
+        """
+        Serialize the changed fields of `obj`. The relations in `changes`, as
+        returned by `relation_changes`, are sent in the add/remove form of
+        flask-restless instead of as the full list of members.
+        """
+        changes = changes or {}
+        to_serialize = obj._rlc.dirty
+        if changes:
+            to_serialize = to_serialize.difference(changes)
+        object_dict = self._serialize(obj, to_serialize, autosave=True)
+        for attr, (added, removed) in changes.items():
+            if added or removed:
+                object_dict[attr] = {
+                    "add": self.clean(attr, added, autosave=True),
+                    "remove": self.clean(attr, removed, autosave=True),
+                }
+        return object_dict
+
+    def relation_changes(self, obj):
+        """
+        The members added to and removed from the changed to-many relations of
+        `obj` since it was loaded or saved, for the relations that tracked them.
+        """
+        if obj._rlc.is_new:
+            return {}
+        changes = {}
+        for attr in obj._rlc.dirty:
+            value = obj._rlc.values.get(attr)
+            if not isinstance(value, TypedList):
+                continue
+            if value.parent is obj and value.for_attr == attr:
+                delta = value.changes()
+                if delta is not None:
+                    changes[attr] = delta
+        return changes
 
     def _serialize(self, obj, to_serialize, autosave=False):
         # create attribute dict
@@ -57,12 +125,17 @@ class ObjectSerializer:
         return self._raw_serialize(obj, to_serialize, autosave)
 
     def _raw_serialize(self, obj, to_serialize, autosave=False):
+        cleaners = self.compiled.get(obj.__class__, ({},))[0]
+        values = obj._rlc.values
         object_dict = {}
         for attr in to_serialize:
-            if attr not in obj._rlc.values:
+            if attr not in values or isinstance(values[attr], LazyRelation):
                 continue
-            value = obj._rlc.values[attr]
-            object_dict[attr] = self.clean(attr, value, autosave)
+            cleaner = cleaners.get(attr)
+            if cleaner:
+                object_dict[attr] = cleaner(values[attr], autosave)
+            else:
+                object_dict[attr] = self.clean(attr, values[attr], autosave)
         return object_dict
 
     def clean(self, attr, value, autosave):
@@ -76,6 +149,53 @@ class ObjectSerializer:
             value = [self.clean(attr, v, autosave) for v in value]
         return value
 
+    def _scalar_cleaner(self, attr):
+        clean = self.clean
+
+        def cleaner(value, autosave):
+            if type(value) in SCALAR_TYPES:
+                return value
+            return clean(attr, value, autosave)
+
+        return cleaner
+
+    def _date_cleaner(self, attr):
+        clean = self.clean
+
+        def cleaner(value, autosave):
+            if value is None:
+                return value
+            if type(value) in (date, datetime):
+                return value.isoformat()
+            return clean(attr, value, autosave)
+
+        return cleaner
+
+    def _reference_cleaner(self, attr):
+        clean = self.clean
+        base_object = self.opts.BaseObject
+
+        def cleaner(value, autosave):
+            if isinstance(value, base_object):
+                rlc = value._rlc
+                if autosave and rlc.is_new:
+                    rlc.save()
+                return {rlc.pk_name: rlc.pk_val}
+            return clean(attr, value, autosave)
+
+        return cleaner
+
+    def _references_cleaner(self, attr):
+        clean = self.clean
+        reference = self._reference_cleaner(attr)
+
+        def cleaner(value, autosave):
+            if isinstance(value, (list, set, tuple)):
+                return [reference(v, autosave) for v in value]
+            return clean(attr, value, autosave)
+
+        return cleaner
+
 
 class ObjectDeserializer:
     def __init__(self, client, opts):
@@ -108,17 +228,41 @@ class ObjectDeserializer:
             handler = relation_type_handlers[obj._rlc.relhelper.type(field)]
             handler(obj, field, val, obj._rlc.relhelper.model(field))
 
+    def related(self, rel_model, raw):
+        if self.opts.reference_stubs and raw.get(rel_model._rlc.pk_name):
+            return rel_model._stub(raw)
+        return rel_model(**raw)
+
+    def is_lazy(self, obj, field):
+        lazy = self.opts.lazy_relations
+        if not lazy or lazy is True:
+            return bool(lazy)
+        # relations of a polymorphic parent are configured on the parent
+        for klass in type(obj).__mro__:
+            if "_rlc" in vars(klass):
+                if "{}.{}".format(klass._rlc.class_name, field) in lazy:
+                    return True
+        return False
+
     @log_loading("blue")
     def handle_o2m(self, obj, field, val, rel_model):
+        if not obj._rlc.is_new and self.is_lazy(obj, field):
+            # embedded objects are ignored, pages are loaded when accessed
+            setattr(obj, field, LazyRelation(rel_model, obj, field))
+            return
         typed_list = self.opts.TypedListClass(rel_model, obj, field)
         if val is not State.VOID:
             if val is None:
                 val = []
-            for rel_obj in val:
-                if isinstance(rel_obj, dict):
-                    rel_obj = rel_model(**rel_obj)
-                with pretty_logger():
-                    typed_list.append(rel_obj)
+            rel_objs = [
+                self.related(rel_model, rel_obj)
+                if isinstance(rel_obj, dict)
+                else rel_obj
+                for rel_obj in val
+            ]
+            with pretty_logger():
+                typed_list.extend(rel_objs)
+            typed_list._mark_saved()
             set_attr(obj, field, typed_list)
         elif obj._rlc.is_new:
             set_attr(obj, field, typed_list)
@@ -126,7 +270,7 @@ class ObjectDeserializer:
     @log_loading("cyan")
     def handle_m2o(self, obj, field, val, rel_model):
         if isinstance(val, dict):
-            val = rel_model(**val)
+            val = self.related(rel_model, val)
         if hasattr(val.__class__, "__bases__"):
             if self.opts.BaseObject in val.__class__.__bases__:
                 set_attr(obj, field, val)
@@ -10,11 +10,6 @@ class UncallableMethod(Exception):
 def construct_method(opts, client, method, method_details):
     method = opts.Method(method, method_details, client.connection)
 
-    def func(self, *args, **kwargs):
-        return method(self, *args, **kwargs)
-
-    # code = func.__code__
-    # func = types.FunctionType(code, func.__globals__, method.name)
     params = []
     for param in method_details["args"]:
         params.append(inspect.Parameter(param, inspect.Parameter.POSITIONAL_OR_KEYWORD))
@@ -26,9 +21,40 @@ def construct_method(opts, client, method, method_details):
             )
         )
 
-    func.__signature__ = inspect.Signature(params)
-    func.__name__ = method.name
-    return func
+    return MethodDescriptor(method, inspect.Signature(params))
+
+
+class MethodDescriptor:
+    def __init__(self, method, signature):
+        self.method = method
+        self.__signature__ = signature
+        self.__name__ = method.name
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        return BoundMethod(self.method, obj, self.__signature__)
+
+
+class BoundMethod:
+    def __init__(self, method, obj, signature):
+        self.method = method
+        self.obj = obj
+        self.__signature__ = signature
+        self.__name__ = method.name
+
+    def __call__(self, *args, **kwargs):
+        return self.method(self.obj, *args, **kwargs)
+
+    def submit(self, *args, **kwargs):
+        """Run the remote method in the background and return a future."""
+        return self.method.submit(self.obj, *args, **kwargs)
+
+    def send(self, *args, **kwargs):
+        return self.method.send(self.obj, *args, **kwargs)
+
+    def load(self, result):
+        return self.method.load(result)
 
 
 class Method:
@@ -41,22 +67,26 @@ class Method:
         self.kwargsvar = details["kwargsvar"]
 
     def __call__(self, obj, *args, **kwargs):
+        return self.load(self.send(obj, *args, **kwargs))
+
+    def submit(self, obj, *args, **kwargs):
+        return self.connection.executor.submit(self, obj, *args, **kwargs)
+
+    def send(self, obj, *args, **kwargs):
         if obj._rlc.is_new:
             raise UncallableMethod("Cannot call methods on new objects.")
         self.validate_params(args, kwargs)
         rlc = obj._rlc
         url = "{}/{}/{}".format(rlc.method_url, rlc.pk_val, self.name)
-        payload = {"payload": self.serialize_params(args, kwargs)}
-        result = self.connection.request(url, http_method="post", json=payload)
-        result = self.cereal.loads(result["payload"])
-        return result
+        params = self.payload.dumps({"args": args, "kwargs": kwargs})
+        return self.connection.request(url, http_method="post", **params)
 
-    @property
-    def cereal(self):
-        return self.connection.client.cereal
+    def load(self, result):
+        return self.payload.loads(result)
 
-    def serialize_params(self, args, kwargs):
-        return self.cereal.dumps({"args": args, "kwargs": kwargs})
+    @property
+    def payload(self):
+        return self.connection.client.payload
 
     def validate_params(self, args, kwargs):
         if not self.argsvar and len(args) < len(self.args):
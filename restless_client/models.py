@@ -1,7 +1,5 @@
 import logging
 
-import crayons
-
 from .inspect import inspect
 from .utils import generate_id
 
@@ -25,22 +23,43 @@ class BaseObject:
         self._load(kwargs)
 
     def _load(self, kwargs):
+        self._rlc.pending = None
         self._rlc.deserializer.load(self, kwargs)
         self._rlc.client._register(self)
 
+    @classmethod
+    def _stub(cls, kwargs):
+        """
+        Return the instance for `kwargs`, holding on to `kwargs` instead of
+        loading them. They're loaded the first time one of its attributes is
+        read, see `InstanceState.hydrate`.
+        """
+        obj = cls.__new__(cls, **kwargs)
+        rlc = obj._rlc
+        with rlc.client.loading:
+            object.__setattr__(obj, rlc.pk_name, kwargs[rlc.pk_name])
+        rlc.pending = dict(rlc.pending or {}, **kwargs)
+        return obj
+
     def __new__(cls, **kwargs):
         key = None
         meta = cls._rlc
         if kwargs.get(meta.pk_name):
             key = "%s%s" % (cls.__name__, kwargs[meta.pk_name])
-        if key in meta.client.registry:
-            obj = meta.client.registry[key]
-            logger.debug(crayons.yellow("Using existing {}".format(key)))
-        else:
-            cls = get_class(cls, kwargs, meta)
-            obj = object.__new__(cls)
+
+        def create():
+            obj = object.__new__(get_class(cls, kwargs, meta))
             obj._rlc = inspect(obj)
-            logger.debug(crayons.yellow("initialising {}".format(key)))
+            return obj
+
+        obj, created = meta.client._get_or_create(key, create)
+        if logger.isEnabledFor(logging.DEBUG):
+            import crayons
+
+            if created:
+                logger.debug(crayons.yellow("initialising {}".format(key)))
+            else:
+                logger.debug(crayons.yellow("Using existing {}".format(key)))
         return obj
 
     def __setattr__(self, name, value):
@@ -0,0 +1,55 @@
+import logging
+
+logger = logging.getLogger("restless-client")
+
+# how much of the gap between the current and the ideal page size is closed
+# per observed page, so a single slow page doesn't collapse the page size
+SMOOTHING = 0.5
+
+
+class PageSizeTuner:
+    """
+    Keeps track of the `results_per_page` to request per endpoint.
+
+    The page size is derived from the observed payload size and latency of
+    earlier pages, aiming for pages of roughly `target_page_bytes` that take
+    no longer than `target_page_latency` seconds. A fixed `page_size` disables
+    tuning altogether.
+    """
+
+    def __init__(self, opts):
+        self.page_size = opts.page_size
+        self.min_page_size = opts.min_page_size
+        self.max_page_size = opts.max_page_size
+        self.target_bytes = opts.target_page_bytes
+        self.target_latency = opts.target_page_latency
+        self.sizes = {}
+        self.server_max = {}
+
+    def get(self, obj_class):
+        if self.page_size:
+            return self.page_size
+        key = obj_class._rlc.base_url
+        return self.sizes.get(key, self.upper_bound(key))
+
+    def upper_bound(self, key):
+        return min(self.max_page_size, self.server_max.get(key, self.max_page_size))
+
+    def observe(self, obj_class, requested, received, nbytes, seconds, last_page):
+        if self.page_size or not received:
+            return
+        key = obj_class._rlc.base_url
+        if received < requested and not last_page:
+            # the server silently caps results_per_page to its own maximum
+            self.server_max[key] = received
+
+        ideal = self.target_bytes / max(nbytes / received, 1)
+        if seconds:
+            ideal = min(ideal, received * self.target_latency / seconds)
+
+        current = self.sizes.get(key, requested)
+        size = int(current + (ideal - current) * SMOOTHING)
+        size = max(self.min_page_size, min(size, self.upper_bound(key)))
+        if size != current:
+            logger.debug("Page size for {} tuned to {}".format(key, size))
+        self.sizes[key] = size
@@ -0,0 +1,81 @@
+import logging
+import warnings
+
+logger = logging.getLogger("restless-client")
+
+MSGPACK = "application/msgpack"
+
+
+class JsonPayload:
+    """
+    cereal payloads as hex encoded strings inside a JSON body. This is the
+    format every flask-restless-datamodel server understands.
+    """
+
+    name = "json"
+
+    def __init__(self, cereal):
+        self.cereal = cereal
+
+    def dumps(self, value, wrap=True):
+        payload = self.cereal.dumps(value)
+        return {"json": {"payload": payload} if wrap else payload}
+
+    def accept(self):
+        return {}
+
+    def loads(self, result):
+        return self.cereal.loads(result["payload"])
+
+
+class MsgpackPayload(JsonPayload):
+    """
+    cereal payloads sent as the raw msgpack body, skipping the hex and JSON
+    encoding on both ends. Only used when the server advertises it.
+    """
+
+    name = "msgpack"
+
+    def dumps(self, value, wrap=True):
+        import msgpack
+
+        data = msgpack.packb(value, default=self.cereal._encode)
+        headers = {"Content-Type": MSGPACK, "Accept": MSGPACK}
+        return {"data": data, "headers": headers, "raw": True}
+
+    def accept(self):
+        return {"headers": {"Accept": MSGPACK}, "raw": True}
+
+    def loads(self, result):
+        if isinstance(result, dict):
+            # the server answered in the JSON format after all
+            return super().loads(result)
+        import msgpack
+
+        try:
+            return msgpack.unpackb(result, object_hook=self.cereal._decode, raw=False)
+        except Exception as e:
+            if self.cereal.raise_load_errors:
+                raise e
+            warnings.warn("Loading failed, returning raw value: {}".format(e))
+            return msgpack.unpackb(result, raw=False)
+
+
+PAYLOAD_FORMATS = {
+    JsonPayload.name: JsonPayload,
+    MsgpackPayload.name: MsgpackPayload,
+}
+
+
+def negotiate_payload(cereal, preferred, server_formats):
+    """
+    Pick the payload format for method and property calls. "auto" uses msgpack
+    when the server lists it in its datamodel meta, and JSON otherwise so older
+    servers keep working.
+    """
+    if preferred == "auto":
+        preferred = JsonPayload.name
+        if MsgpackPayload.name in (server_formats or []):
+            preferred = MsgpackPayload.name
+    logger.debug("Using the {} payload format".format(preferred))
+    return PAYLOAD_FORMATS[preferred](cereal)
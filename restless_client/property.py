@@ -25,6 +25,9 @@ class LoadableProperty:
             # if obj is None, the __get__ is invoked on class level
             # returning FilterNode will allow the user to build filters
             return FilterNode(objtype, self.attribute)
+        rlc = obj._rlc
+        if rlc.pending is not None and self.attribute != rlc.pk_name:
+            rlc.hydrate()
         if self.getval(obj) is State.VOID and not obj._rlc.is_new:
             args = (obj.__class__, obj._rlc.pk_val)
             logger.debug("Loading {} with id {} remotely".format(*args))
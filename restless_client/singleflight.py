@@ -0,0 +1,46 @@
+import json
+import logging
+import threading
+from concurrent.futures import Future
+
+logger = logging.getLogger("restless-client")
+
+
+class SingleFlight:
+    """
+    Lets concurrent identical calls share a single execution.
+
+    The first caller for a key runs the call, callers arriving while it is in
+    flight wait for it and get the same result (or exception). Nothing is
+    cached: once the call finishes, the next caller runs it again. Results are
+    shared as is, so callers must not mutate them.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+
+    def do(self, key, fn, *args, **kwargs):
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = Future()
+        if not leader:
+            logger.debug("Joining in-flight request {}".format(key))
+            return call.result()
+
+        try:
+            call.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            call.set_exception(e)
+        finally:
+            with self.lock:
+                del self.calls[key]
+        return call.result()
+
+
+def request_key(method, url, params=None, headers=None, raw=False):
+    return json.dumps(
+        [method, url, params or {}, headers or {}, raw], sort_keys=True, default=str
+    )
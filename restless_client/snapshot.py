@@ -0,0 +1,189 @@
+import logging
+import os
+import tempfile
+import time
+import zlib
+from collections import namedtuple
+from datetime import date, datetime
+from datetime import time as dt_time
+from datetime import timedelta
+from decimal import Decimal
+
+from .collections import LazyRelation
+from .utils import State
+
+logger = logging.getLogger("restless-client")
+
+# bumped whenever the layout of a snapshot changes
+SNAPSHOT_VERSION = 2
+
+# a related object, stored by class name and primary key
+Ref = namedtuple("Ref", ["class_name", "pk"])
+
+# msgpack extension types of the values msgpack can't store itself
+UNKNOWN, REF, DATETIME, DATE, TIME, TIMEDELTA, DECIMAL = range(7)
+
+
+def encode(value):
+    import msgpack
+
+    if isinstance(value, Ref):
+        return msgpack.ExtType(REF, pack(list(value)))
+    if isinstance(value, tuple):
+        return list(value)
+    if isinstance(value, datetime):
+        return msgpack.ExtType(DATETIME, value.isoformat().encode())
+    if isinstance(value, date):
+        return msgpack.ExtType(DATE, value.isoformat().encode())
+    if isinstance(value, dt_time):
+        return msgpack.ExtType(TIME, value.isoformat().encode())
+    if isinstance(value, timedelta):
+        return msgpack.ExtType(TIMEDELTA, pack(list(value.__reduce__()[1])))
+    if isinstance(value, Decimal):
+        return msgpack.ExtType(DECIMAL, str(value).encode())
+    # left out of the snapshot, the value is loaded from the server instead
+    return msgpack.ExtType(UNKNOWN, b"")
+
+
+def decode(code, data):
+    if code == REF:
+        return Ref(*unpack(data))
+    if code == DATETIME:
+        return datetime.fromisoformat(data.decode())
+    if code == DATE:
+        return date.fromisoformat(data.decode())
+    if code == TIME:
+        return dt_time.fromisoformat(data.decode())
+    if code == TIMEDELTA:
+        return timedelta(*unpack(data))
+    if code == DECIMAL:
+        return Decimal(data.decode())
+    return State.VOID
+
+
+def pack(value):
+    import msgpack
+
+    # strict, so tuples like Ref reach `encode` instead of becoming lists
+    return msgpack.packb(value, default=encode, use_bin_type=True, strict_types=True)
+
+
+def unpack(data):
+    import msgpack
+
+    return msgpack.unpackb(data, ext_hook=decode, raw=False)
+
+
+def snapshot(client, path):
+    """
+    Write the loaded objects of `client` to `path`. Only values as they were
+    loaded from the server are kept: new objects and unsaved changes are left
+    out, and related objects are stored by primary key.
+
+    The file is written next to `path` first and then moved into place, so
+    clients restoring it never read a partly written snapshot.
+    """
+    with client._registry_lock:
+        objects = list(client.registry.values())
+    state = {
+        "version": SNAPSHOT_VERSION,
+        "server_version": client.server_version,
+        "created": time.time(),
+        "objects": [dump_object(obj) for obj in objects if not obj._rlc.is_new],
+    }
+    data = zlib.compress(pack(state))
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    logger.debug("Wrote {} objects to {}".format(len(state["objects"]), path))
+
+
+def dump_object(obj):
+    rlc = obj._rlc
+    rlc.hydrate()
+    values = {}
+    for field, value in rlc.values.items():
+        if field in rlc.dirty or isinstance(value, LazyRelation):
+            continue
+        if field in rlc._relations:
+            value = dump_relation(value)
+        values[field] = value
+    return rlc.class_name, rlc.pk_val, values
+
+
+def dump_relation(value):
+    if isinstance(value, list):
+        return [Ref(o._rlc.class_name, o._rlc.pk_val) for o in value]
+    if value is not None:
+        return Ref(value._rlc.class_name, value._rlc.pk_val)
+    return None
+
+
+def restore(client, path, max_age=None):
+    """
+    Load the objects of a snapshot written by `snapshot` into `client`. The
+    snapshot is ignored when it doesn't exist, can't be read, was taken
+    against another server version, or is older than `max_age` seconds.
+    Returns the number of restored objects.
+    """
+    if not os.path.exists(path):
+        logger.debug("No snapshot found at {}".format(path))
+        return 0
+    try:
+        with open(path, "rb") as fh:
+            state = unpack(zlib.decompress(fh.read()))
+    except Exception as e:
+        logger.warning("Ignoring snapshot {}, it can't be read: {}".format(path, e))
+        return 0
+
+    if not isinstance(state, dict) or state.get("version") != SNAPSHOT_VERSION:
+        logger.info("Ignoring snapshot {}, unknown format".format(path))
+        return 0
+    if state["server_version"] != client.server_version:
+        logger.info("Ignoring snapshot {}, server version changed".format(path))
+        return 0
+    if max_age is not None and time.time() - state["created"] > max_age:
+        logger.info("Ignoring snapshot {}, it is out of date".format(path))
+        return 0
+
+    with client.loading:
+        objects = {}
+        for class_name, pk, values in state["objects"]:
+            klass = client._classes.get(class_name)
+            if klass is not None:
+                pk_name = klass._rlc.pk_name
+                objects[(class_name, pk)] = klass(**{pk_name: pk}), values
+
+        for obj, values in objects.values():
+            for field, value in values.items():
+                if field in obj._rlc.values or value is State.VOID:
+                    continue
+                if field in obj._rlc._relations:
+                    value = load_relation(client, obj, field, value, objects)
+                    if value is None and values[field] is not None:
+                        # the related object isn't in the snapshot
+                        continue
+                obj._rlc.values[field] = value
+    logger.debug("Restored {} objects from {}".format(len(objects), path))
+    return len(objects)
+
+
+def load_relation(client, obj, field, value, objects):
+    if isinstance(value, list):
+        typed_list = client.opts.TypedListClass(
+            obj._rlc.relhelper.model(field), obj, field
+        )
+        for ref in value:
+            if ref not in objects:
+                return None
+            typed_list._append_loaded(objects[ref][0])
+        typed_list._mark_saved()
+        return typed_list
+    if value is not None:
+        return objects.get(value, (None,))[0]
+    return None
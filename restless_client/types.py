@@ -1,8 +1,6 @@
 import json
 from collections import defaultdict
 
-from dateutil import parser
-
 CASTERS = {}
 OBJECT_HOOKS = defaultdict(dict)
 
@@ -22,10 +20,14 @@ def cast_type(value, desired_type, raise_on_error=False):
 
 
 def date_caster(value):
+    from dateutil import parser
+
     return parser.parse(value).date()
 
 
 def datetime_caster(value):
+    from dateutil import parser
+
     return parser.parse(value)
 
 
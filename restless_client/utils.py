@@ -1,16 +1,16 @@
 import logging
 import re
+import threading
 import warnings
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 from enum import Enum
+from functools import lru_cache
+from itertools import count
 
-import crayons
-from dateutil import parser
-from packaging import version
-from pbr.version import VersionInfo
-from pytz import UTC
+# third party modules used here are imported where they're needed, so that
+# importing the client stays fast
 
-VERSION = VersionInfo("flask-restless-client").release_string()
 RECOMMENDED_SERVER_VERSION = [
     "0.2.1",
     "0.2.2",
@@ -29,8 +29,9 @@ LIKELY_PARSABLE_DATETIME = re.compile(
 )
 logger = logging.getLogger("restless-client")
 
-LOCAL_ID_COUNT = 0
-DEPTH = 0
+# next() on a count is atomic, so ids stay unique across threads
+LOCAL_IDS = count(1)
+LOGGING_STATE = threading.local()
 
 
 class State(Enum):
@@ -40,9 +41,28 @@ class State(Enum):
 
 
 def generate_id():
-    global LOCAL_ID_COUNT
-    LOCAL_ID_COUNT += 1
-    return "C{}".format(LOCAL_ID_COUNT)
+    return "C{}".format(next(LOCAL_IDS))
+
+
+def run_concurrently(fn, items, concurrency):
+    """
+    Call `fn` for every item on a pool of at most `concurrency` threads.
+
+    Results are returned in the order of `items`. An exception raised for an
+    item is returned in its place rather than raised.
+    """
+
+    def call(item):
+        try:
+            return fn(item)
+        except Exception as e:
+            return e
+
+    items = list(items)
+    if concurrency <= 1 or len(items) <= 1:
+        return [call(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(items))) as executor:
+        return list(executor.map(call, items))
 
 
 def urljoin(*args):
@@ -50,9 +70,35 @@ def urljoin(*args):
     return "/".join(args)
 
 
+@lru_cache(maxsize=None)
+def get_version():
+    from pbr.version import VersionInfo
+
+    return VersionInfo("flask-restless-client").release_string()
+
+
+def __getattr__(name):
+    # the version is only looked up when asked for, it scans package metadata
+    if name == "VERSION":
+        return get_version()
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+
+def utc():
+    from pytz import UTC
+
+    return UTC
+
+
+def parse_datetime(value, as_timezone=None):
+    from dateutil import parser
+
+    return parser.parse(value).astimezone(as_timezone or utc())
+
+
 def datetime_from_value(value, as_timezone):
     if isinstance(value, str) and LIKELY_PARSABLE_DATETIME.search(value):
-        return parser.parse(value).astimezone(as_timezone)
+        return parse_datetime(value, as_timezone)
     elif isinstance(value, list):
         for idx, item in enumerate(value):
             if isinstance(item, dict):
@@ -63,7 +109,7 @@ def datetime_from_value(value, as_timezone):
     return value
 
 
-def parse_custom_types(dct, as_timezone=UTC, **kwargs):
+def parse_custom_types(dct, as_timezone=None, **kwargs):
     for k, v in dct.items():
         try:
             if isinstance(v, dict):
@@ -76,23 +122,56 @@ def parse_custom_types(dct, as_timezone=UTC, **kwargs):
     return dct
 
 
+def parse_custom_values(dct, as_timezone=None, **kwargs):
+    """
+    Like `parse_custom_types`, for use as a JSON object hook. The hook already
+    ran for nested objects, so only the values of `dct` itself are parsed.
+    """
+    for k, v in dct.items():
+        try:
+            dct[k] = custom_value(v, as_timezone)
+        except Exception:
+            pass
+
+    return dct
+
+
+def custom_value(value, as_timezone):
+    if isinstance(value, str) and LIKELY_PARSABLE_DATETIME.search(value):
+        return parse_datetime(value, as_timezone)
+    elif isinstance(value, list):
+        return [custom_value(item, as_timezone) for item in value]
+    return value
+
+
 class UserException(Exception):
     pass
 
 
 class LoadingManager:
+    """
+    Keeps track of whether the client is loading. The state is kept per
+    thread, so a load in one thread doesn't affect dirty tracking or locking
+    in another.
+    """
+
     def __init__(self, client):
         self.client = client
-        self.active_contexts = 0
+        self.local = threading.local()
+
+    @property
+    def active_contexts(self):
+        return getattr(self.local, "active_contexts", 0)
+
+    @property
+    def state(self):
+        return State.LOADING if self.active_contexts else State.LOADABLE
 
     def __enter__(self):
-        self.active_contexts += 1
-        self.client.state = State.LOADING
+        self.local.active_contexts = self.active_contexts + 1
 
     def __exit__(self, exc_type, exc_value, traceback):
-        self.active_contexts -= 1
-        if self.active_contexts == 0:
-            self.client.state = State.LOADABLE
+        self.local.active_contexts = self.active_contexts - 1
 
 
 class RelationHelper:
@@ -133,17 +212,19 @@ class RelationHelper:
 
 @contextmanager
 def pretty_logger(depth=2):
-    global DEPTH
-    DEPTH += depth
+    LOGGING_STATE.depth = get_depth() + depth
     yield
-    DEPTH -= depth
+    LOGGING_STATE.depth -= depth
 
 
 def get_depth():
-    return DEPTH
+    return getattr(LOGGING_STATE, "depth", 0)
 
 
 def check_server_compatibility(server_version):
+    import crayons
+    from packaging import version
+
     message = (
         "\n\nYour {0} version is more recent than the {1} version, "
         "incompatibilities may arise.\nConsider downgrading your {0} "
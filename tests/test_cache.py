@@ -0,0 +1,104 @@
+import gc
+import time
+from unittest.mock import Mock
+
+import pytest
+
+from restless_client.cache import PropertyCache
+from restless_client.utils import State
+
+
+class Stub:
+    _rlc = Mock(class_name="Stub")
+
+
+@pytest.fixture
+def cache():
+    return PropertyCache(Mock(property_ttl=True))
+
+
+def test_it_caches_a_value(cache):
+    obj = Stub()
+    cache.set(obj, "total", 5)
+    assert cache.get(obj, "total") == 5
+    assert cache.get(Stub(), "total") is State.VOID
+
+
+def test_it_does_not_cache_without_a_ttl():
+    cache = PropertyCache(Mock(property_ttl=None))
+    obj = Stub()
+    cache.set(obj, "total", 5)
+    assert cache.get(obj, "total") is State.VOID
+
+
+def test_it_expires_values_after_their_ttl(cache):
+    obj = Stub()
+    cache.set(obj, "total", 5, ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get(obj, "total") is State.VOID
+
+
+def test_it_can_configure_the_ttl_per_model_and_property():
+    cache = PropertyCache(Mock(property_ttl={"Stub": 10, "Stub.total": None}))
+    assert cache.ttl_for(Stub(), "count") == 10
+    assert cache.ttl_for(Stub(), "total") is None
+
+
+def test_it_can_expire_properties(cache):
+    obj = Stub()
+    cache.set(obj, "total", 5)
+    cache.set(obj, "count", 6)
+    cache.expire(obj, "total")
+    assert cache.get(obj, "total") is State.VOID
+    assert cache.get(obj, "count") == 6
+    cache.expire(obj)
+    assert cache.get(obj, "count") is State.VOID
+
+
+def test_it_does_not_keep_instances_alive(cache):
+    cache.set(Stub(), "total", 5)
+    gc.collect()
+    assert len(cache.entries) == 0
+
+
+def test_it_caches_a_remote_property(mcl):
+    mcl.property_cache.ttl = True
+    apt = mcl.Apartment.query.one()
+    mcl.connection.request = Mock(wraps=mcl.connection.request)
+    assert apt.some_property == apt.some_property == "a_property_value"
+    assert mcl.connection.request.call_count == 1
+    mcl.expire(apt, "some_property")
+    assert apt.some_property == "a_property_value"
+    assert mcl.connection.request.call_count == 2
+
+
+def test_it_can_prefetch_remote_properties_of_a_collection(mcl):
+    apartments = mcl.Apartment.query.all()
+    apartments.prefetch_properties("some_property", "settable_property")
+    mcl.connection.request = Mock(side_effect=Exception("no requests expected"))
+    assert apartments[0].some_property == "a_property_value"
+    assert apartments[0].settable_property == "ApAntMent"
+
+
+def test_prefetched_values_are_kept_for_a_while_without_a_ttl():
+    cache = PropertyCache(
+        Mock(property_ttl=None, _property_ttl_set_by_user=False, prefetch_ttl=60)
+    )
+    assert cache.prefetch_ttl_for(Stub(), "total") == 60
+
+
+def test_prefetching_respects_a_configured_ttl():
+    opts = Mock(property_ttl={"Stub": 10, "Stub.total": None})
+    opts._property_ttl_set_by_user = True
+    cache = PropertyCache(opts)
+    assert cache.prefetch_ttl_for(Stub(), "count") == 10
+    assert not cache.prefetch_ttl_for(Stub(), "total")
+
+
+def test_it_does_not_prefetch_properties_that_are_not_cached(mcl):
+    mcl.property_cache.ttl = {"Apartment.some_property": 0}
+    mcl.property_cache.prefetch_ttl = None
+    apartments = mcl.Apartment.query.all()
+    mcl.connection.request = Mock(wraps=mcl.connection.request)
+    apartments.prefetch_properties("some_property")
+    mcl.connection.request.assert_not_called()
@@ -0,0 +1,36 @@
+import importlib.util
+from unittest.mock import patch
+
+import pytest
+from conftest import RaiseSession
+
+from restless_client import Client
+from restless_client.cli import main
+
+
+@pytest.fixture
+def models(app, instances, tmpdir):
+    RaiseSession.register("http://app", app)
+    path = str(tmpdir.join("models.py"))
+    with patch("restless_client.cli.Session", RaiseSession):
+        assert main(["generate", "http://app", "-o", path]) == 0
+    spec = importlib.util.spec_from_file_location("models", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_it_generates_annotated_classes(models):
+    assert "AntColony" in models.DATAMODEL
+    assert "name" in models.AntColony.__annotations__
+    assert issubclass(models.SandwichFormicarium, models.Formicarium)
+
+
+def test_a_client_uses_the_generated_module(models):
+    with patch("restless_client.connection.Connection.request") as request:
+        client = Client(url="http://app", session=RaiseSession(), models=models)
+        request.assert_not_called()
+    colony = client.AntColony.query.get(1)
+    assert colony.name == "Argentine Ant"
+    assert isinstance(colony, models.AntColony)
+    assert isinstance(colony.formicarium, models.Formicarium)
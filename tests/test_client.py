@@ -1,9 +1,20 @@
-from unittest.mock import patch
+import gzip
+import json
+import logging
+import subprocess
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock, patch
 
 import pytest
 import requests
+from conftest import RaiseSession
 
-from restless_client.utils import State
+import restless_client.client as client_module
+from restless_client import Client, log_to_stdout
+from restless_client.ext.auth import BaseSession
+from restless_client.utils import State, generate_id, parse_custom_values
 
 
 @patch("restless_client.connection.Connection.request")
@@ -12,3 +23,126 @@ def test_it_set_status_back_to_loadable_if_httperror(request, mcl):
     with pytest.raises(requests.HTTPError):
         apt = mcl.Apartment.query.get(1)
     assert mcl.state is State.LOADABLE
+
+
+def test_loading_state_is_kept_per_thread(cl):
+    entered, release = threading.Event(), threading.Event()
+
+    def load():
+        with cl.loading:
+            entered.set()
+            release.wait()
+
+    thread = threading.Thread(target=load)
+    thread.start()
+    entered.wait()
+    assert not cl.is_loading
+    with cl.loading:
+        assert cl.is_loading
+    release.set()
+    thread.join()
+    assert cl.state is State.LOADABLE
+
+
+def test_it_generates_unique_ids_across_threads():
+    with ThreadPoolExecutor(8) as executor:
+        ids = list(executor.map(lambda _: generate_id(), range(1000)))
+    assert len(set(ids)) == 1000
+
+
+def test_concurrent_loads_share_one_instance(cl):
+    raw = {"id": 1, "name": "Argentine Ant"}
+    cl.connection.request = lambda *args, **kwargs: dict(raw)
+    with ThreadPoolExecutor(8) as executor:
+        colonies = list(
+            executor.map(lambda _: cl.connection.load(cl.AntColony, 1), range(50))
+        )
+    assert len(set(map(id, colonies))) == 1
+
+
+def test_it_can_configure_the_connection_pool(app, instances):
+    RaiseSession.register("http://app", app)
+    session = RaiseSession()
+    Client(url="http://app", session=session, pool_maxsize=32)
+    assert session.get_adapter("https://elsewhere")._pool_maxsize == 32
+
+
+def test_it_counts_the_bytes_it_transfers(cl):
+    stats = cl.connection.stats
+    before = stats.bytes_received_uncompressed
+    cl.AntColony.query.all()
+    assert stats.bytes_received_uncompressed > before
+
+
+def test_it_compresses_large_request_bodies(cl):
+    cl.connection.opts.compress_requests_above = 100
+    small = {"json": {"name": "x"}}
+    assert cl.connection._compress_body(small) is None
+    assert "json" in small
+
+    values = {"name": "x" * 500}
+    large = {"json": values, "headers": {"Accept": "application/json"}}
+    assert cl.connection._compress_body(large) == len(json.dumps(values))
+    assert json.loads(gzip.decompress(large["data"])) == values
+    assert large["headers"]["Content-Encoding"] == "gzip"
+    assert large["headers"]["Accept"] == "application/json"
+
+
+def test_successful_responses_are_not_decoded_by_the_session():
+    response = Mock(status_code=200)
+    assert BaseSession().validate_response(response) is response
+    response.json.assert_not_called()
+
+
+def test_error_responses_carry_the_server_message():
+    response = requests.Response()
+    response.status_code = 400
+    response.reason = "Bad Request"
+    response._content = b'{"message": "nope"}'
+    with pytest.raises(requests.HTTPError) as e:
+        BaseSession().validate_response(response)
+    assert "nope" in str(e.value)
+
+
+def test_nested_values_are_parsed_in_one_pass():
+    raw = json.loads(
+        '{"a": {"b": "2020-01-01T10:00:00"}, "c": ["2020-01-02T10:00:00", {"d": 1}]}',
+        object_hook=parse_custom_values,
+    )
+    assert raw["a"]["b"].year == 2020
+    assert raw["c"][0].day == 2
+    assert raw["c"][1] == {"d": 1}
+
+
+def test_importing_the_client_defers_optional_dependencies():
+    deferred = ["crayons", "dateutil", "pytz", "packaging", "prettytable", "pbr"]
+    deferred += ["ordered_set", "cereal_lazer", "msgpack"]
+    code = "import sys, restless_client; print(sorted(set({}) & set(sys.modules)))"
+    result = subprocess.run(
+        [sys.executable, "-c", code.format(deferred)],
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    assert result.stdout.strip() == "[]"
+
+
+def test_it_does_not_format_log_records_nobody_listens_to(cl):
+    with patch("restless_client.connection.pprint.pformat") as pformat:
+        with patch("restless_client.marshal.logger.info") as info:
+            cl.AntColony.query.all()
+    pformat.assert_not_called()
+    info.assert_not_called()
+
+
+def test_it_can_log_to_stdout(cl, capsys):
+    logger = logging.getLogger("restless-client")
+    with patch("restless_client.client.steam_handler", None):
+        log_to_stdout(logging.INFO)
+        try:
+            cl.AntColony.query.get(1)
+            assert "loading" in capsys.readouterr().out
+        finally:
+            logger.removeHandler(client_module.steam_handler)
+            logger.setLevel(logging.NOTSET)
+            logger.propagate = True
@@ -0,0 +1,157 @@
+from unittest.mock import patch
+
+import pytest
+import requests
+from conftest import RaiseSession
+
+from restless_client import Client
+from restless_client.collections import TypedList
+
+
+def test_membership_follows_the_list(cl):
+    formicarium = cl.Formicarium.query.get(1)
+    colonies = formicarium.colonies
+    colony = colonies[0]
+    other = cl.AntColony.query.get(3)
+    assert colony in colonies
+    assert other not in colonies
+
+    colonies.remove(colony)
+    assert colony not in colonies
+    colonies.append(other)
+    assert other in colonies
+    assert colonies.pop() is other
+    assert other not in colonies
+
+
+def test_extend_marks_dirty_and_updates_backrefs_once(cl):
+    formicarium = cl.Formicarium.query.get(1)
+    colonies = [cl.AntColony.query.get(3), cl.AntColony.query.get(4)]
+    formicarium.colonies.extend(colonies)
+    assert "colonies" in formicarium._rlc.dirty
+    assert all(colony in formicarium.colonies for colony in colonies)
+    assert all(colony.formicarium is formicarium for colony in colonies)
+
+
+def test_extend_checks_all_types_first(cl):
+    formicarium = cl.Formicarium.query.get(1)
+    before = list(formicarium.colonies)
+    with pytest.raises(TypeError):
+        formicarium.colonies.extend([cl.AntColony.query.get(3), formicarium])
+    assert formicarium.colonies == before
+
+
+def test_removing_a_missing_item_raises(cl):
+    formicarium = cl.Formicarium.query.get(1)
+    with pytest.raises(ValueError):
+        formicarium.colonies.remove(cl.AntColony.query.get(3))
+
+
+def test_backref_lists_stay_indexed(cl):
+    collection = cl.AntCollection.query.get(1)
+    formicarium = cl.Formicarium.query.get(1)
+    formicarium.collection
+    formicaria = collection.formicaria
+    assert formicarium in formicaria
+    formicaria.remove(formicarium)
+    assert formicarium not in formicaria
+    formicaria.append(formicarium)
+    assert formicarium in formicaria
+
+
+def test_relation_changes_are_tracked(cl):
+    formicarium = cl.Formicarium.query.get(1)
+    colonies = formicarium.colonies
+    colony, other = colonies[0], cl.AntColony.query.get(3)
+    assert colonies.changes() == ([], [])
+    colonies.append(other)
+    colonies.remove(colony)
+    assert colonies.changes() == ([other], [colony])
+    colonies.append(colony)
+    colonies.pop()
+    assert colonies.changes() == ([other], [colony])
+    colonies.insert(0, colony)
+    assert colonies.changes() is None
+
+
+def test_saving_sends_the_relation_changes(cl, app):
+    formicarium = cl.Formicarium.query.get(1)
+    colony = cl.AntColony.query.get(3)
+    count = len(formicarium.colonies)
+    formicarium.colonies.append(colony)
+    with patch.object(cl.connection, "request", wraps=cl.connection.request) as request:
+        cl.save(formicarium)
+    sent = request.call_args[1]["json"]
+    assert sent == {"colonies": {"add": [{"id": colony.id}], "remove": []}}
+    assert len(app.Formicarium.query.get(1).colonies) == count + 1
+    assert formicarium.colonies.changes() == ([], [])
+
+
+def test_rejected_relation_changes_are_sent_as_the_full_list(cl, app):
+    formicarium = cl.Formicarium.query.get(1)
+    count = len(formicarium.colonies)
+    formicarium.colonies.append(cl.AntColony.query.get(3))
+    request = cl.connection.request
+
+    def reject_changes(url, **kwargs):
+        if isinstance(kwargs.get("json", {}).get("colonies"), dict):
+            response = requests.Response()
+            response.status_code = 400
+            raise requests.HTTPError(response=response)
+        return request(url, **kwargs)
+
+    with patch.object(cl.connection, "request", side_effect=reject_changes) as mock:
+        cl.save(formicarium)
+    assert len(mock.call_args[1]["json"]["colonies"]) == count + 1
+    assert formicarium._rlc.base_url in cl.connection.deltas_unsupported
+    assert len(app.Formicarium.query.get(1).colonies) == count + 1
+
+
+@pytest.fixture
+def lcl(app, instances):
+    RaiseSession.register("http://app", app)
+    return Client(
+        url="http://app",
+        session=RaiseSession(),
+        lazy_relations={"Formicarium.colonies"},
+        page_size=1,
+    )
+
+
+def society(client):
+    return client.Formicarium.query.filter_by(name="The Free SociAnty").one()
+
+
+def test_lazy_relations_load_the_pages_that_are_used(lcl):
+    colonies = society(lcl).colonies
+    with patch.object(
+        lcl.connection, "request", wraps=lcl.connection.request
+    ) as request:
+        assert colonies[1].name == "Garden Ant"
+        assert request.call_count == 2
+        assert len(colonies) == 2
+        assert [colony.name for colony in colonies] == ["Fire Ant", "Garden Ant"]
+        assert request.call_count == 2
+
+
+def test_lazy_relations_count_on_the_server(lcl):
+    colonies = society(lcl).colonies
+    with patch.object(
+        lcl.connection, "request", wraps=lcl.connection.request
+    ) as request:
+        assert len(colonies) == 2
+        assert request.call_count == 1
+        assert not colonies._pages[1][0]._rlc.is_new
+
+
+def test_changing_a_lazy_relation_materializes_it(lcl, app):
+    formicarium = society(lcl)
+    colony = lcl.AntColony.query.filter_by(name="Argentine Ant").one()
+    formicarium.colonies.append(colony)
+    assert isinstance(formicarium.colonies, TypedList)
+    assert len(formicarium.colonies) == 3
+    lcl.save()
+    assert (
+        len(app.Formicarium.query.filter_by(name="The Free SociAnty").one().colonies)
+        == 3
+    )
@@ -1,7 +1,7 @@
 import pytest
 from requests.exceptions import HTTPError
 
-from restless_client.filter import FilterMixIn
+from restless_client.filter import FilterMixIn, Unevaluable, evaluate
 
 
 def test_eq(fcl):
@@ -192,3 +192,18 @@ def test_filter_does_not_prevent_chaining_with_query(fcl):
 
     allobjs = o.query.all()
     assert all([isinstance(obj, o) for obj in allobjs])
+
+
+def test_filters_can_be_evaluated_against_loaded_instances(fcl):
+    o = fcl.Object1
+    obj = o.query.get(4)
+    f = ((o.attribute2 > 3) & o.attribute1.in_(["o1a14", "x"])).to_raw_filter()
+    assert evaluate(f, obj)
+    assert not evaluate((o.attribute2 != 4).to_raw_filter(), obj)
+    with pytest.raises(Unevaluable):
+        evaluate((o.attribute2 == "4").to_raw_filter(), obj)
+    with pytest.raises(Unevaluable):
+        evaluate(o.attribute1.like_("o1%").to_raw_filter(), obj)
+    obj.attribute2 = 5
+    with pytest.raises(Unevaluable):
+        evaluate((o.attribute2 == 5).to_raw_filter(), obj)
@@ -0,0 +1,91 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock
+
+import pytest
+from conftest import RaiseSession
+
+from restless_client import Client
+from restless_client.hedging import MIN_SAMPLES, HedgePolicy, hedged
+
+
+@pytest.fixture
+def policy():
+    opts = Mock(
+        hedge_percentile=0.9, hedge_budget=0.5, hedge_min_delay=0.01, hedge_window=100
+    )
+    policy = HedgePolicy(opts)
+    for i in range(MIN_SAMPLES):
+        policy.record(0.001 * i)
+    return policy
+
+
+@pytest.fixture
+def executor():
+    with ThreadPoolExecutor(4) as executor:
+        yield executor
+
+
+def test_it_does_not_hedge_without_enough_samples():
+    opts = Mock(
+        hedge_percentile=0.9, hedge_budget=1, hedge_min_delay=0, hedge_window=10
+    )
+    assert HedgePolicy(opts).delay() is None
+
+
+def test_it_calls_directly_without_enough_samples():
+    opts = Mock(
+        hedge_percentile=0.9, hedge_budget=1, hedge_min_delay=0, hedge_window=10
+    )
+    policy = HedgePolicy(opts)
+    executor = Mock()
+    assert (
+        hedged(policy, executor, threading.current_thread) is threading.current_thread()
+    )
+    executor.submit.assert_not_called()
+    assert len(policy.latencies) == 1
+
+
+def test_it_derives_the_delay_from_a_percentile(policy):
+    for _ in range(100):
+        policy.record(0.5)
+    assert policy.delay() == 0.5
+
+
+def test_it_never_hedges_more_than_its_budget(policy):
+    for _ in range(4):
+        policy.delay()
+    assert policy.acquire()
+    assert policy.acquire()
+    assert not policy.acquire()
+
+
+def test_a_hedge_answers_a_stalled_request(policy, executor):
+    release = threading.Event()
+    calls = []
+
+    def fn(url):
+        calls.append(url)
+        if len(calls) == 1:
+            release.wait(5)
+            return "stalled"
+        return "hedged"
+
+    started = time.perf_counter()
+    assert hedged(policy, executor, fn, "url") == "hedged"
+    assert time.perf_counter() - started < 1
+    release.set()
+
+
+def test_it_does_not_hedge_fast_requests(policy, executor):
+    fn = Mock(return_value="fast")
+    assert hedged(policy, executor, fn, "url") == "fast"
+    fn.assert_called_once_with("url")
+
+
+def test_hedged_gets_go_through_the_connection(app, instances):
+    RaiseSession.register("http://app", app)
+    client = Client(url="http://app", session=RaiseSession(), hedge=True)
+    assert client.connection.hedging
+    assert client.AntColony.query.get(1).name == "Argentine Ant"
@@ -1,3 +1,7 @@
+import json
+from datetime import datetime
+from unittest import mock
+
 import pytest
 
 from restless_client import inspect
@@ -171,4 +175,138 @@ def test_it_can_refresh_an_instance(cl):
     assert not inspect(colony).dirty
 
 
+def test_it_can_refresh_many_instances_at_once(cl, app):
+    colonies = cl.AntColony.query.all()
+    colonies[0].name = "Changed"
+    app.AntColony.query.get(colonies[1].id).name = "Changed remotely"
+    app.db.session.delete(app.AntColony.query.get(colonies[2].id))
+    app.db.session.commit()
+
+    requests = cl.connection.stats.requests
+    missing = colonies.refresh(chunk_size=2)
+    assert cl.connection.stats.requests - requests == (len(colonies) + 1) // 2
+    assert missing == [colonies[2]]
+    assert colonies[0].name == "Argentine Ant"
+    assert not inspect(colonies[0]).dirty
+    assert colonies[1].name == "Changed remotely"
+
+
+def test_it_can_bulk_update_a_query(cl, app):
+    # the in-memory test database can't serve concurrent writes
+    cl.opts.concurrency = 1
+    query = cl.AntColony.query.filter(cl.AntColony.color == "red")
+    assert query.update({"color": "blue"}) == 2
+    assert app.AntColony.query.filter_by(color="blue").count() == 2
+    assert all(
+        c.color == "blue" for c in cl.AntColony.query.filter_by(color="blue").all()
+    )
+
+
+def test_it_remembers_the_server_does_not_allow_bulk_updates(cl):
+    cl.opts.concurrency = 1
+    cl.AntColony.query.filter(cl.AntColony.color == "red").update({"color": "blue"})
+    assert cl.AntColony._rlc.base_url in cl.connection.bulk_unsupported
+
+
+def test_it_sends_a_single_request_for_a_bulk_update(cl):
+    colony = cl.AntColony.query.get(1)
+    cl.connection.request = mock.Mock(return_value={"num_modified": 1})
+    query = cl.AntColony.query.filter(cl.AntColony.id == 1)
+    assert query.update({"name": "Renamed"}, synchronize_session=False) == 1
+    cl.connection.request.assert_called_once_with(
+        colony._rlc.base_url,
+        http_method="patch",
+        data=json.dumps(
+            {
+                "name": "Renamed",
+                "q": {"filters": [{"name": "id", "op": "==", "val": 1}]},
+            }
+        ),
+        headers={"Content-Type": "application/json"},
+    )
+
+
+def test_bulk_operations_can_filter_on_datetimes(mcl):
+    mcl.opts.concurrency = 1
+    mcl.refresh(mcl.Apartment.query.one().function_with_new_obj())
+    typer = mcl.MisterTyper
+    query = typer.query.filter(typer.dt < datetime(2030, 1, 1))
+    assert query.update({"boolean": True}) == 1
+    assert typer.query.one().boolean is True
+
+    # the test server only allows per-object updates, pretend it allows bulk ones
+    mcl.connection.bulk_unsupported.clear()
+    mcl.connection.request = mock.Mock(return_value={"num_modified": 1})
+    typer.query.filter(typer.dt < datetime(2030, 1, 1)).update({"boolean": False})
+    sent = json.loads(mcl.connection.request.call_args[1]["data"])
+    assert sent["q"]["filters"][0]["val"] == "2030-01-01T00:00:00"
+
+    mcl.connection.request = mock.Mock(return_value={"num_deleted": 1})
+    assert typer.query.filter(typer.dt < datetime(2030, 1, 1)).delete() == 1
+    params = mcl.connection.request.call_args[1]["params"]
+    assert "2030-01-01T00:00:00" in params["q"]
+
+
+def test_a_bulk_update_updates_the_loaded_matches_in_place(cl):
+    colonies = cl.AntColony.query.all()
+    red = [c for c in colonies if c.color == "red"]
+    others = {c: c.color for c in colonies if c.color != "red"}
+    cl.connection.request = mock.Mock(return_value={"num_modified": len(red)})
+    cl.AntColony.query.filter(cl.AntColony.color == "red").update({"color": "blue"})
+    cl.connection.request.assert_called_once()
+    assert all(c.color == "blue" for c in red)
+    assert all(c.color == color for c, color in others.items())
+
+
+def test_a_bulk_update_expires_what_it_cannot_evaluate(cl):
+    colonies = cl.AntColony.query.all()
+    cl.connection.request = mock.Mock(return_value={"num_modified": 1})
+    cl.AntColony.query.filter(cl.AntColony.name.like_("%Ant")).update({"color": "blue"})
+    cl.connection.request.assert_called_once()
+    assert all("color" not in c._rlc.values for c in colonies)
+    assert all("name" in c._rlc.values for c in colonies)
+
+
+def test_a_bulk_delete_removes_the_loaded_matches(cl):
+    colonies = cl.AntColony.query.all()
+    cl.connection.request = mock.Mock(return_value={"num_deleted": 2})
+    assert cl.AntColony.query.filter(cl.AntColony.color == "red").delete() == 2
+    cl.connection.request.assert_called_once()
+    for colony in colonies:
+        registered = cl._key_from_object(colony) in cl.registry
+        assert registered == (colony.color != "red")
+
+
+def test_it_can_bulk_delete_a_query(cl, app):
+    cl.opts.concurrency = 1
+    query = cl.AntColony.query.filter(cl.AntColony.color == "red")
+    colonies = query.all()
+    assert cl.AntColony.query.filter(cl.AntColony.color == "red").delete() == 2
+    assert app.AntColony.query.filter_by(color="red").count() == 0
+    for colony in colonies:
+        assert cl._key_from_object(colony) not in cl.registry
+
+
+def test_embedded_objects_can_be_loaded_on_first_read(cl):
+    cl.opts.reference_stubs = True
+    colony = cl.AntColony.query.get(1)
+    formicarium = colony._rlc.values["formicarium"]
+    assert formicarium._rlc.pending is not None
+    assert list(formicarium._rlc.values) == ["id"]
+
+    with mock.patch.object(cl.connection, "request") as request:
+        assert formicarium.name == "Specimen-1"
+        request.assert_not_called()
+    assert formicarium._rlc.pending is None
+    assert formicarium is cl.Formicarium.query.get(formicarium.id)
+
+
+def test_a_full_load_replaces_a_reference_stub(cl):
+    cl.opts.reference_stubs = True
+    formicarium = cl.AntColony.query.get(1)._rlc.values["formicarium"]
+    cl.Formicarium.query.filter_by(id=formicarium.id).one()
+    assert formicarium._rlc.pending is None
+    assert "name" in formicarium._rlc.values
+
+
 # tests not suited for this module, need to be moved
@@ -15,6 +15,9 @@ class TypedList(list):
         self.for_attr = for_attr
         super().__init__(*args, **kwargs)
 
+    def _mark_saved(self):
+        pass
+
 
 @pytest.fixture
 def ds():
@@ -23,6 +26,8 @@ def ds():
         Mock(
             TypedListClass=TypedList,
             BaseObject=Mock,
+            lazy_relations=(),
+            reference_stubs=False,
         ),
     )
 
@@ -106,3 +111,26 @@ def test_it_can_serialize_a_dirty_object(s):
     obj._rlc.dirty = set(["attr1", "rel1"])
     result = s.serialize_dirty(obj)
     assert result == {"attr1": "someattr", "rel1": {"id": 2}}
+
+
+def test_the_compiled_serializer_matches_the_generic_one(mcl):
+    serializer = mcl.serializer
+    objects = list(mcl.Formicarium.query.all()) + list(mcl.AntColony.query.all())
+    objects.append(mcl.Apartment.query.one().function_with_new_obj())
+    for obj in objects:
+        assert obj.__class__ in serializer.compiled
+        fields = list(obj._rlc.attributes()) + list(obj._rlc.relations())
+        generic = {
+            f: serializer.clean(f, v, False)
+            for f, v in obj._rlc.values.items()
+            if f in fields
+        }
+        assert serializer._raw_serialize(obj, fields) == generic
+
+
+def test_cereal_serializes_with_the_compiled_cleaners(mcl):
+    serializer = mcl.serializer
+    for obj in list(mcl.Formicarium.query.all()) + list(mcl.AntColony.query.all()):
+        fields = list(obj._rlc.attributes()) + list(obj._rlc.relations())
+        encode = mcl.cereal.to_format[obj.__class__]
+        assert encode(obj) == serializer._raw_serialize(obj, fields)
@@ -1,8 +1,16 @@
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime, timedelta
+from unittest.mock import Mock
+
+import pytest
+from cereal_lazer import Cereal
 
 from restless_client import types
+from restless_client.collections import ObjectCollection
 from restless_client.inspect import inspect
+from restless_client.method import Method, MethodDescriptor
+from restless_client.payload import JsonPayload
 
 
 def test_it_can_run_a_remote_method_without_params(mcl):
@@ -87,3 +95,58 @@ def test_it_can_execute_an_object_hook_defined_as_strings(mcl):
 
     apt = mcl.Apartment.query.one()
     assert apt.some_hybrid.__class__ == mcl.AntCollection
+
+
+def test_it_can_invoke_a_remote_method_on_a_query_result(mcl):
+    apartments = mcl.Apartment.query.all()
+    assert apartments.invoke("function_with_params", 5, "test") == ["5: test"]
+
+
+def test_it_can_submit_a_remote_method_in_the_background(mcl):
+    future = mcl.Apartment.query.one().function_with_params.submit(5, "test")
+    assert future.result() == "5: test"
+
+
+@pytest.fixture
+def Stub():
+    cereal = Cereal()
+    client = Mock(payload=JsonPayload(cereal))
+    connection = Mock(client=client, executor=ThreadPoolExecutor(2))
+
+    def request(url, **kwargs):
+        args = cereal.loads(kwargs["json"]["payload"])["args"]
+        if args[0] == "boom":
+            raise ValueError(url)
+        return {"payload": cereal.dumps("{}: {}".format(url, args[0]))}
+
+    connection.request.side_effect = request
+    details = {"args": ["what"], "kwargs": [], "argsvar": None, "kwargsvar": None}
+    method = Method("speak", details, connection)
+
+    class Stub:
+        speak = MethodDescriptor(method, None)
+        _rlc = Mock(client=Mock(opts=Mock(concurrency=4)))
+
+        def __init__(self, pk):
+            self._rlc = Mock(is_new=False, method_url="m", pk_val=pk)
+
+    return Stub
+
+
+def test_it_can_submit_a_remote_method(Stub):
+    future = Stub(1).speak.submit("hi")
+    assert future.result() == "m/1/speak: hi"
+
+
+def test_it_can_invoke_a_remote_method_on_a_collection(Stub):
+    collection = ObjectCollection(Stub, [Stub(i) for i in range(5)], attrs=[])
+    assert collection.invoke("speak", "hi") == [
+        "m/{}/speak: hi".format(i) for i in range(5)
+    ]
+
+
+def test_it_returns_exceptions_aligned_with_the_collection(Stub):
+    collection = ObjectCollection(Stub, [Stub(1), Stub(2)], attrs=[])
+    results = collection.invoke("speak", "boom", concurrency=2)
+    assert [str(r) for r in results] == ["m/1/speak", "m/2/speak"]
+    assert all(isinstance(r, ValueError) for r in results)
@@ -0,0 +1,64 @@
+from unittest.mock import Mock
+
+import pytest
+
+from restless_client.paging import PageSizeTuner
+
+
+def model(url="http://app/api/formicarium"):
+    return Mock(_rlc=Mock(base_url=url))
+
+
+@pytest.fixture
+def opts():
+    return Mock(
+        page_size=None,
+        min_page_size=10,
+        max_page_size=100,
+        target_page_bytes=10000,
+        target_page_latency=1.0,
+    )
+
+
+def test_it_starts_at_the_max_page_size(opts):
+    assert PageSizeTuner(opts).get(model()) == 100
+
+
+def test_it_uses_a_fixed_page_size(opts):
+    opts.page_size = 25
+    tuner = PageSizeTuner(opts)
+    tuner.observe(model(), 25, 25, 10**7, 10, False)
+    assert tuner.get(model()) == 25
+
+
+def test_it_shrinks_the_page_size_for_wide_rows(opts):
+    tuner = PageSizeTuner(opts)
+    tuner.observe(model(), 100, 100, 100 * 1000, 0.1, False)
+    assert tuner.get(model()) == 55
+
+
+def test_it_shrinks_the_page_size_for_slow_pages(opts):
+    tuner = PageSizeTuner(opts)
+    tuner.observe(model(), 100, 100, 1000, 4.0, False)
+    assert tuner.get(model()) == 62
+
+
+def test_it_never_exceeds_the_server_max(opts):
+    tuner = PageSizeTuner(opts)
+    tuner.observe(model(), 100, 50, 500, 0.01, False)
+    assert tuner.get(model()) == 50
+    assert tuner.get(model("http://app/api/antcolony")) == 100
+
+
+def test_query_sends_the_page_size(cl):
+    cl.connection.request = Mock(
+        return_value={"objects": [], "page": 1, "total_pages": 0}
+    )
+    cl.AntColony.query.page_size(3).all()
+    params = cl.connection.request.call_args[1]["params"]
+    assert params["results_per_page"] == 3
+
+
+def test_it_loads_all_pages_with_a_small_page_size(cl):
+    colonies = cl.AntColony.query.page_size(2).all()
+    assert len(colonies) == len(cl.AntColony.query.all()) == 6
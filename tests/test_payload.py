@@ -0,0 +1,47 @@
+from datetime import date
+
+import pytest
+from cereal_lazer import Cereal
+
+import restless_client.payload as payload_module
+from restless_client.payload import JsonPayload, MsgpackPayload
+
+
+@pytest.fixture
+def cereal():
+    return Cereal()
+
+
+def test_it_uses_the_json_format_for_older_servers(cereal):
+    assert isinstance(
+        payload_module.negotiate_payload(cereal, "auto", None), JsonPayload
+    )
+
+
+def test_it_negotiates_the_msgpack_format(cereal):
+    payload = payload_module.negotiate_payload(cereal, "auto", ["json", "msgpack"])
+    assert isinstance(payload, MsgpackPayload)
+
+
+def test_it_can_force_a_format(cereal):
+    payload = payload_module.negotiate_payload(cereal, "json", ["msgpack"])
+    assert type(payload) is JsonPayload
+
+
+def test_the_json_format_wraps_hex_encoded_cereal(cereal):
+    params = JsonPayload(cereal).dumps([1, date(2018, 1, 1)])
+    assert params == {"json": {"payload": cereal.dumps([1, date(2018, 1, 1)])}}
+    assert JsonPayload(cereal).loads(params["json"]) == [1, date(2018, 1, 1)]
+
+
+def test_the_msgpack_format_sends_the_raw_body(cereal):
+    payload = MsgpackPayload(cereal)
+    params = payload.dumps({"args": [date(2018, 1, 1)]})
+    assert params["headers"]["Content-Type"] == "application/msgpack"
+    assert bytes.fromhex(cereal.dumps({"args": [date(2018, 1, 1)]})) == params["data"]
+    assert payload.loads(params["data"]) == {"args": [date(2018, 1, 1)]}
+
+
+def test_the_msgpack_format_understands_json_answers(cereal):
+    payload = MsgpackPayload(cereal)
+    assert payload.loads({"payload": cereal.dumps(5)}) == 5
@@ -1,7 +1,10 @@
+import json
 from collections import namedtuple
 
 import pytest
+from conftest import RaiseSession
 
+from restless_client import Client
 from restless_client.connection import Connection
 from restless_client.filter import Query
 from restless_client.inspect import inspect
@@ -121,3 +124,51 @@ def test_chaining_query_with_filter_does_not_have_side_effects(fcl):
     assert len(objects) == 5
     assert len(o.query.filter(o.attribute1 == "o1a11").all()) == 1
     assert len(o.query.all()) == 5
+
+
+def test_it_can_perform_an_all_with_keyset_pagination(cl):
+    result = cl.AntColony.query.page_size(2).all(pagination="keyset")
+    assert [r.id for r in result] == [1, 2, 3, 4, 5, 6]
+
+
+def test_keyset_pagination_seeks_on_the_last_seen_key(cl):
+    request = cl.connection.request
+    seen = []
+
+    def spy(url, **kwargs):
+        seen.append(json.loads(kwargs["params"]["q"]))
+        return request(url, **kwargs)
+
+    cl.connection.request = spy
+    result = list(cl.AntColony.query.page_size(4).iter(keyset=True))
+    assert len(result) == 6
+    assert "filters" not in seen[0]
+    assert seen[1]["filters"] == [{"name": "id", "op": ">", "val": 4}]
+
+
+def test_keyset_pagination_respects_filters_and_limit(cl):
+    query = cl.AntColony.query.filter(cl.AntColony.id > 1).limit(3).page_size(2)
+    result = query.all(pagination="keyset", key="name")
+    assert [r.name for r in result] == [
+        "Black House Ant",
+        "Bulldog Ant",
+        "Carpenter Ant",
+    ]
+
+
+def test_it_can_iterate_over_numbered_pages(cl):
+    result = list(cl.AntColony.query.page_size(4).iter())
+    assert [r.id for r in result] == [1, 2, 3, 4, 5, 6]
+
+
+def test_numbered_pages_keep_their_size_while_the_tuner_adapts(app, instances):
+    RaiseSession.register("http://app", app)
+    client = Client(
+        url="http://app",
+        session=RaiseSession(),
+        max_page_size=4,
+        min_page_size=1,
+        target_page_bytes=300,
+    )
+    result = list(client.AntColony.query.iter())
+    assert [r.id for r in result] == [1, 2, 3, 4, 5, 6]
@@ -0,0 +1,66 @@
+import gzip
+import io
+from unittest.mock import patch
+
+import pytest
+import requests
+from conftest import RaiseSession
+
+import restless_client.ext.replay as replay_module
+from restless_client import Client
+from restless_client.ext.replay import ReplaySession, exchange_key
+
+
+@pytest.fixture
+def recording(app, instances, tmpdir):
+    RaiseSession.register("http://app", app)
+    path = str(tmpdir.join("recording.json"))
+    session = replay_module.RecordingSession(RaiseSession(), path)
+    client = Client(url="http://app", session=session)
+    names = [colony.name for colony in client.AntColony.query.all()]
+    with pytest.raises(requests.HTTPError):
+        client.connection.request("http://app/api/ant-colony-that-is-not-there")
+    session.save()
+    return path, names
+
+
+def test_it_replays_a_recording(recording):
+    path, names = recording
+    client = Client(url="http://app", session=ReplaySession(path))
+    assert [colony.name for colony in client.AntColony.query.all()] == names
+
+
+def test_it_replays_errors(recording):
+    path, _ = recording
+    client = Client(url="http://app", session=ReplaySession(path))
+    with pytest.raises(requests.HTTPError):
+        client.connection.request("http://app/api/ant-colony-that-is-not-there")
+
+
+def test_it_raises_for_requests_that_were_not_recorded(recording):
+    path, _ = recording
+    client = Client(url="http://app", session=ReplaySession(path))
+    with pytest.raises(replay_module.ReplayMissError):
+        client.AntColony.query.get(1)
+
+
+def test_it_simulates_latency(recording):
+    path, _ = recording
+    session = ReplaySession(path, latency=0.05)
+    with patch("restless_client.ext.replay.time.sleep") as sleep:
+        Client(url="http://app", session=session)
+    sleep.assert_called_once_with(0.05)
+
+
+def gzipped(body, mtime):
+    buf = io.BytesIO()
+    with gzip.GzipFile(fileobj=buf, mode="wb", mtime=mtime) as fh:
+        fh.write(body)
+    return buf.getvalue()
+
+
+def test_gzipped_bodies_are_keyed_by_their_content():
+    headers = {"Content-Encoding": "gzip"}
+    first = exchange_key("put", "http://app", gzipped(b"{}", 1), headers)
+    second = exchange_key("put", "http://app", gzipped(b"{}", 2), headers)
+    assert first == second == exchange_key("put", "http://app", b"{}")
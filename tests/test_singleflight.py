@@ -0,0 +1,70 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+
+from restless_client.singleflight import SingleFlight, request_key
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(2)
+        return {"id": 1}
+
+    with ThreadPoolExecutor(4) as executor:
+        futures = [executor.submit(flight.do, "key", fetch) for _ in range(4)]
+        # give the other callers time to join the call in flight
+        time.sleep(0.2)
+        release.set()
+        results = [future.result() for future in futures]
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert not flight.calls
+
+
+def test_exceptions_are_shared_and_not_kept():
+    flight = SingleFlight()
+
+    def fail():
+        raise ValueError("nope")
+
+    with pytest.raises(ValueError):
+        flight.do("key", fail)
+    assert flight.do("key", lambda: 1) == 1
+
+
+def test_the_key_ignores_param_order():
+    assert request_key("get", "u", {"a": 1, "b": 2}) == request_key(
+        "get", "u", {"b": 2, "a": 1}
+    )
+    assert request_key("get", "u", {"a": 1}) != request_key("get", "u", {"a": 2})
+
+
+def test_concurrent_loads_of_an_object_send_one_request(cl):
+    session = cl.connection.session
+    original = session.get
+    release = threading.Event()
+    started = []
+
+    def slow_get(*args, **kwargs):
+        started.append(1)
+        release.wait(2)
+        return original(*args, **kwargs)
+
+    with patch.object(session, "get", side_effect=slow_get):
+        with ThreadPoolExecutor(4) as executor:
+            futures = [
+                executor.submit(cl.connection.load, cl.Formicarium, 1) for _ in range(4)
+            ]
+            time.sleep(0.2)
+            release.set()
+            results = [future.result() for future in futures]
+    assert len(started) == 1
+    assert all(result is results[0] for result in results)
@@ -0,0 +1,104 @@
+import time
+from datetime import date, datetime
+from datetime import time as dt_time
+from datetime import timedelta, timezone
+from decimal import Decimal
+from unittest.mock import patch
+
+from conftest import RaiseSession
+
+from restless_client import Client
+from restless_client.snapshot import Ref, pack, unpack
+from restless_client.utils import State
+
+
+def restored_client(path, **kwargs):
+    return Client(url="http://app", session=RaiseSession(), restore_from=path, **kwargs)
+
+
+def test_it_restores_a_snapshot_without_requests(cl, tmpdir):
+    path = str(tmpdir.join("snapshot"))
+    colonies = cl.AntColony.query.all()
+    for colony in colonies:
+        colony.formicarium.colonies
+    cl.snapshot(path)
+
+    client = restored_client(path)
+    with patch.object(client.connection, "request") as request:
+        colony = client.registry["AntColony1"]
+        assert colony.name == colonies[0].name
+        assert colony.formicarium.name == colonies[0].formicarium.name
+        assert colony in colony.formicarium.colonies
+        request.assert_not_called()
+
+
+def test_it_leaves_out_unsaved_changes(cl, tmpdir):
+    path = str(tmpdir.join("snapshot"))
+    colony = cl.AntColony.query.get(1)
+    name = colony.name
+    colony.name = "changed"
+    cl.snapshot(path)
+
+    client = restored_client(path)
+    assert "name" not in client.registry["AntColony1"]._rlc.values
+    assert client.registry["AntColony1"].name == name
+
+
+def test_it_ignores_stale_snapshots(cl, tmpdir):
+    path = str(tmpdir.join("snapshot"))
+    cl.AntColony.query.all()
+    cl.snapshot(path)
+    with patch("restless_client.snapshot.time.time", return_value=time.time() + 100):
+        client = restored_client(path, max_snapshot_age=10)
+    assert not client.registry
+
+
+def test_it_ignores_snapshots_of_another_server_version(cl, tmpdir):
+    path = str(tmpdir.join("snapshot"))
+    cl.AntColony.query.all()
+    cl.server_version = "0.0.1"
+    cl.snapshot(path)
+    assert not restored_client(path).registry
+
+
+def test_it_ignores_a_missing_snapshot(cl, tmpdir):
+    assert not restored_client(str(tmpdir.join("nothing"))).registry
+
+
+def test_it_ignores_an_unreadable_snapshot(cl, tmpdir):
+    path = str(tmpdir.join("snapshot"))
+    cl.AntColony.query.all()
+    cl.snapshot(path)
+    with open(path, "rb") as fh:
+        data = fh.read()
+    with open(path, "wb") as fh:
+        fh.write(data[: len(data) // 2])
+    assert not restored_client(path).registry
+
+
+def test_it_restores_typed_values(mcl, tmpdir):
+    path = str(tmpdir.join("snapshot"))
+    mt = mcl.Apartment.query.one().function_with_new_obj()
+    typer = mcl.MisterTyper.query.get(mt.id)
+    mcl.refresh(typer)
+    mcl.snapshot(path)
+    assert tmpdir.listdir() == [tmpdir.join("snapshot")]
+
+    client = restored_client(path)
+    restored = client.registry["MisterTyper{}".format(mt.id)]
+    assert restored._rlc.values == typer._rlc.values
+
+
+def test_it_packs_values_msgpack_cant_store():
+    value = [
+        Ref("AntColony", 1),
+        datetime(2018, 1, 1, 12, tzinfo=timezone.utc),
+        date(2018, 1, 1),
+        dt_time(12, 30),
+        timedelta(days=1, seconds=2, microseconds=3),
+        Decimal("1.10"),
+        b"bytes",
+        {"json": ["value"]},
+    ]
+    assert unpack(pack(value)) == value
+    assert unpack(pack(object())) is State.VOID
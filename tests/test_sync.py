@@ -0,0 +1,73 @@
+from conftest import RaiseSession
+
+from restless_client import Client
+
+
+def bump(app, attribute1, **values):
+    obj = app.Object1.query.filter_by(attribute1=attribute1).one()
+    for key, value in values.items():
+        setattr(obj, key, value)
+    app.db.session.commit()
+
+
+def test_it_loads_everything_on_the_first_sync(fcl):
+    fcl.connection.page_sizes.page_size = 2
+    objects = fcl.sync(fcl.Object1, updated_field="attribute2")
+    assert [o.attribute2 for o in objects] == [1, 2, 3, 4, 5]
+    assert fcl.watermarks["Object1"].value == 5
+
+
+def test_it_only_loads_changes_since_the_last_sync(fcl, filters):
+    fcl.sync(fcl.Object1, updated_field="attribute2")
+    assert len(fcl.sync(fcl.Object1, updated_field="attribute2")) == 0
+
+    bump(filters, "o1a12", attribute2=6, attribute3="changed")
+    objects = fcl.sync(fcl.Object1, updated_field="attribute2")
+    assert [o.attribute1 for o in objects] == ["o1a12"]
+    assert objects[0] is fcl.Object1.query.get(objects[0].id)
+    assert objects[0].attribute3 == "changed"
+    assert fcl.watermarks["Object1"].value == 6
+
+
+def add(app, attribute1, attribute2):
+    app.db.session.add(app.Object1(attribute1=attribute1, attribute2=attribute2))
+    app.db.session.commit()
+
+
+def test_it_loads_late_rows_sharing_the_watermark_value(fcl, filters):
+    fcl.sync(fcl.Object1, updated_field="attribute2")
+    add(filters, "late", 5)
+    objects = fcl.sync(fcl.Object1, updated_field="attribute2")
+    assert [o.attribute1 for o in objects] == ["late"]
+    assert len(fcl.sync(fcl.Object1, updated_field="attribute2")) == 0
+
+
+def test_it_pages_through_tied_values(fcl, filters):
+    fcl.connection.page_sizes.page_size = 2
+    for i in range(5):
+        add(filters, "tied{}".format(i), 3)
+    objects = fcl.sync(fcl.Object1, updated_field="attribute2")
+    assert len(objects) == len(set(o.id for o in objects)) == 10
+    assert [o.attribute2 for o in objects] == sorted(o.attribute2 for o in objects)
+
+
+def test_it_keeps_unsaved_changes(fcl, filters):
+    obj = fcl.sync(fcl.Object1, updated_field="attribute2")[0]
+    obj.attribute3 = "local"
+    bump(filters, obj.attribute1, attribute2=6, attribute3="remote")
+    assert fcl.sync(fcl.Object1, updated_field="attribute2") == [obj]
+    assert obj.attribute3 == "local"
+    assert obj.attribute2 == 6
+    assert "attribute3" in obj._rlc.dirty
+
+
+def test_it_persists_the_watermark(fcl, filters, tmpdir):
+    path = str(tmpdir.join("watermarks.json"))
+    fcl.sync(fcl.Object1, updated_field="attribute2", watermark_path=path)
+    bump(filters, "o1a13", attribute2=7)
+
+    client = Client(url="http://app", session=RaiseSession())
+    objects = client.sync(
+        client.Object1, updated_field="attribute2", watermark_path=path
+    )
+    assert [o.attribute1 for o in objects] == ["o1a13"]